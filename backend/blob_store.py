@@ -0,0 +1,212 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterable, List
+
+
+class BlobStore:
+    """
+    Content-addressed upload storage keyed by SHA-256.
+
+    Identical uploads (from any user or session) are stored once.
+    Files are streamed to disk in chunks; ``gc`` evicts the least
+    recently used blobs once the store grows past ``max_bytes``.
+
+    Per-job work directories (manifests, saved indexes) live under
+    the same root and count against the same budget.
+    """
+
+    CHUNK_SIZE = 1 << 20  # 1 MiB
+
+    def __init__(self, root: str = "storage/blobs", max_bytes: int = 2 << 30):
+        """
+        :param root: Directory holding the blobs
+        :param max_bytes: Disk budget enforced by ``gc``
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, "objects")
+        self.work_root = os.path.join(root, "work")
+        self.tmp_dir = os.path.join(root, "tmp")
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.work_root, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pinned = Counter()
+
+    # -----------------------------
+    # WRITE
+    # -----------------------------
+    def put(self, fileobj: BinaryIO, suffix: str = "", pin: bool = False) -> Dict:
+        """
+        Stream a file-like object into the store.
+
+        With ``pin``, the blob is pinned in the same locked step that
+        stores it, so a concurrent ``gc`` cannot evict it before the
+        caller uses it; release it with ``unpin``.
+
+        Returns:
+        {
+            "digest": "<sha256 hex>",
+            "path": "storage/blobs/objects/ab/<digest>.pdf",
+            "size": 12345
+        }
+        """
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for block in iter(lambda: fileobj.read(self.CHUNK_SIZE), b""):
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+
+            hex_digest = digest.hexdigest()
+            path = self.path_for(hex_digest, suffix)
+
+            with self._lock:
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                    self._touch(path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                if pin:
+                    self._pinned[hex_digest] += 1
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {"digest": hex_digest, "path": path, "size": size}
+
+    def path_for(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}{suffix}")
+
+    # -----------------------------
+    # WORK DIRECTORIES
+    # -----------------------------
+    @staticmethod
+    def work_key(name: str, digests: Iterable[str]) -> str:
+        """
+        Key for a job's work directory: the input name plus the
+        digests of the blobs it was run against.
+        """
+        digest = hashlib.sha256(name.encode("utf-8"))
+        for blob_digest in sorted(digests):
+            digest.update(blob_digest.encode("ascii"))
+        return digest.hexdigest()
+
+    def work_dir(self, key: str) -> str:
+        """
+        Create (or reuse) the work directory for ``key``. Pin the key
+        while the directory is in use; ``gc`` evicts it as one entry.
+        """
+        path = os.path.join(self.work_root, key)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            self._touch(path)
+        return path
+
+    # -----------------------------
+    # PINNING / GC
+    # -----------------------------
+    @contextmanager
+    def pinned(self, digests: Iterable[str]):
+        """
+        Protect blobs from eviction while a job is using them.
+        """
+        digests = list(digests)
+        with self._lock:
+            self._pinned.update(digests)
+        try:
+            yield
+        finally:
+            self.unpin(digests)
+
+    def unpin(self, digests: Iterable[str]):
+        with self._lock:
+            self._pinned.subtract(list(digests))
+            self._pinned += Counter()  # drop zero counts
+
+    def gc(self, keep: Iterable[str] = ()) -> int:
+        """
+        Evict least recently used blobs and work directories until
+        the store fits in ``max_bytes``. Returns the number of bytes freed.
+        """
+        keep = set(keep)
+
+        with self._lock:
+            keep.update(self._pinned)
+
+            entries = self._blob_entries() + self._work_entries()
+            total = sum(size for _, size, _, _ in entries)
+
+            freed = 0
+            for _, size, key, path in sorted(entries):
+                if total - freed <= self.max_bytes:
+                    break
+                if key in keep:
+                    continue
+                try:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                    freed += size
+                except FileNotFoundError:
+                    continue
+
+        return freed
+
+    def _blob_entries(self) -> List:
+        entries = []
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name.split(".", 1)[0], path))
+        return entries
+
+    def _work_entries(self) -> List:
+        entries = []
+        for key in os.listdir(self.work_root):
+            path = os.path.join(self.work_root, key)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+
+            size = 0
+            for dirpath, _, filenames in os.walk(path):
+                for name in filenames:
+                    try:
+                        size += os.path.getsize(os.path.join(dirpath, name))
+                    except FileNotFoundError:
+                        continue
+            entries.append((mtime, size, key, path))
+        return entries
+
+    @staticmethod
+    def _touch(path: str):
+        """
+        Mark a blob as recently used (mtime drives LRU eviction).
+        """
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
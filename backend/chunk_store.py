@@ -0,0 +1,172 @@
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+
+class ChunkStore:
+    """
+    Columnar, memory-mappable chunk metadata.
+
+    Instead of one dict per chunk, keeps:
+    - ref_codes: int32 index into ``reference_ids`` per chunk
+    - ordinals:  int32 chunk number within its reference
+    - text_bytes + offsets: all chunk texts as one UTF-8 blob
+
+    Chunks are grouped by reference, so each reference owns the
+    contiguous row range ``reference_offsets[c]:reference_offsets[c + 1]``.
+    Text and dicts are only materialised for rows that are asked for.
+    """
+
+    CHUNK_ID_PATTERN = re.compile(r"_chunk_(\d+)$")
+
+    def __init__(
+        self,
+        reference_ids: List[str],
+        ref_codes: np.ndarray,
+        ordinals: np.ndarray,
+        text_bytes: np.ndarray,
+        offsets: np.ndarray
+    ):
+        self.reference_ids = reference_ids
+        self.ref_codes = ref_codes
+        self.ordinals = ordinals
+        self.text_bytes = text_bytes
+        self.offsets = offsets
+        self.reference_offsets = np.searchsorted(
+            ref_codes, np.arange(len(reference_ids) + 1)
+        ).astype(np.int64)
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict]) -> Tuple["ChunkStore", np.ndarray]:
+        """
+        Build a store from chunk dicts (see ``TextChunker``).
+
+        Returns (store, order) where ``order[row]`` is the position in
+        ``chunks`` of the chunk stored at ``row``.
+        """
+        reference_ids: List[str] = []
+        codes_by_ref: Dict[str, int] = {}
+        codes = np.empty(len(chunks), dtype=np.int32)
+        ordinals = np.empty(len(chunks), dtype=np.int32)
+        running: Dict[str, int] = {}
+
+        for i, chunk in enumerate(chunks):
+            ref_id = chunk["reference_id"]
+            if ref_id not in codes_by_ref:
+                codes_by_ref[ref_id] = len(reference_ids)
+                reference_ids.append(ref_id)
+            codes[i] = codes_by_ref[ref_id]
+
+            match = cls.CHUNK_ID_PATTERN.search(chunk.get("chunk_id", ""))
+            ordinals[i] = int(match.group(1)) if match else running.get(ref_id, 0)
+            running[ref_id] = running.get(ref_id, 0) + 1
+
+        order = np.argsort(codes, kind="stable")
+
+        encoded = [chunks[i]["text"].encode("utf-8") for i in order]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(
+            np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        )
+        text_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        store = cls(reference_ids, codes[order], ordinals[order], text_bytes, offsets)
+        return store, order
+
+    # -----------------------------
+    # ACCESS
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self.ref_codes)
+
+    def reference_id(self, row: int) -> str:
+        return self.reference_ids[self.ref_codes[row]]
+
+    def chunk_id(self, row: int) -> str:
+        return f"{self.reference_id(row)}_chunk_{self.ordinals[row]}"
+
+    def text(self, row: int) -> str:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return bytes(self.text_bytes[start:end]).decode("utf-8")
+
+    def __getitem__(self, row: int) -> Dict:
+        return {
+            "reference_id": self.reference_id(row),
+            "chunk_id": self.chunk_id(row),
+            "text": self.text(row)
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(len(self)):
+            yield self[row]
+
+    # -----------------------------
+    # PERSISTENCE
+    # -----------------------------
+    def save(self, directory: str):
+        """
+        Write the store to ``directory``. Each file is written under a
+        temporary name and swapped in with ``os.replace``, so stores
+        already memory-mapped from the old files keep reading them.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self._write_atomic(directory, "ref_codes.npy", lambda f: np.save(f, self.ref_codes))
+        self._write_atomic(directory, "ordinals.npy", lambda f: np.save(f, self.ordinals))
+        self._write_atomic(directory, "offsets.npy", lambda f: np.save(f, self.offsets))
+        self._write_atomic(
+            directory, "text.bin", lambda f: np.asarray(self.text_bytes).tofile(f)
+        )
+        self._write_atomic(
+            directory, "references.json",
+            lambda f: f.write(json.dumps(self.reference_ids).encode("utf-8"))
+        )
+
+    @staticmethod
+    def _write_atomic(directory: str, name: str, write: Callable):
+        path = os.path.join(directory, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        return all(
+            os.path.exists(os.path.join(directory, name))
+            for name in ("ref_codes.npy", "ordinals.npy", "offsets.npy",
+                         "text.bin", "references.json")
+        )
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "ChunkStore":
+        """
+        Load a saved store; with ``mmap`` the arrays and text blob are
+        memory-mapped rather than read into RAM.
+        """
+        mmap_mode = "r" if mmap else None
+
+        ref_codes = np.load(os.path.join(directory, "ref_codes.npy"), mmap_mode=mmap_mode)
+        ordinals = np.load(os.path.join(directory, "ordinals.npy"), mmap_mode=mmap_mode)
+        offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode=mmap_mode)
+
+        text_path = os.path.join(directory, "text.bin")
+        if os.path.getsize(text_path) == 0:
+            text_bytes = np.zeros(0, dtype=np.uint8)
+        elif mmap:
+            text_bytes = np.memmap(text_path, dtype=np.uint8, mode="r")
+        else:
+            text_bytes = np.fromfile(text_path, dtype=np.uint8)
+
+        with open(os.path.join(directory, "references.json"), "r", encoding="utf-8") as f:
+            reference_ids = json.load(f)
+
+        return cls(reference_ids, ref_codes, ordinals, text_bytes, offsets)
@@ -1,3 +1,6 @@
+from typing import Dict, List
+
+
 class CitationEngine:
     """
     Generates in-text citations based on citation style.
@@ -29,3 +32,20 @@ class CitationEngine:
 
         # fallback
         return f"({ref_id}, {year})"
+
+    def format_group(self, ref_ids: List[str], metadata: Dict[str, Dict]) -> str:
+        """
+        Generate one in-text citation for several references,
+        e.g. "(A, 2020; B, 2021)" or "[1], [3]".
+        """
+        citations = [
+            self.format_in_text(ref_id, metadata[ref_id]) for ref_id in ref_ids
+        ]
+
+        if len(citations) == 1:
+            return citations[0]
+
+        if self.style == "IEEE":
+            return ", ".join(citations)
+
+        return "(" + "; ".join(c.strip("()") for c in citations) + ")"
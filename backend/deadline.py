@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(RuntimeError):
+    """
+    Raised by a stage that stops early because its deadline passed
+    or the run was cancelled.
+    """
+
+
+class CancellationToken:
+    """
+    Thread-safe flag used to stop a running pipeline from outside
+    (another thread, a UI callback, a resource watchdog).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class Deadline:
+    """
+    Time budget for a run plus its cancellation token.
+
+    ``budget`` is in seconds; None means no time limit (the token
+    can still cancel). Stages poll ``expired`` between units of work,
+    and ``share`` hands a stage a slice of what is left.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[float] = None,
+        token: Optional[CancellationToken] = None
+    ):
+        self.budget = budget
+        self.token = token or CancellationToken()
+        self.start = time.monotonic()
+
+    def share(self, fraction: float) -> "Deadline":
+        """
+        Child deadline over ``fraction`` of the remaining time,
+        sharing this deadline's token.
+        """
+        budget = None if self.budget is None else self.remaining() * fraction
+        return Deadline(budget, self.token)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    def remaining(self) -> float:
+        if self.budget is None:
+            return float("inf")
+        return max(self.budget - self.elapsed(), 0.0)
+
+    def used_fraction(self) -> float:
+        if not self.budget:
+            return 0.0
+        return min(self.elapsed() / self.budget, 1.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.token.cancelled or self.remaining() <= 0
+
+    @property
+    def reason(self) -> Optional[str]:
+        if self.token.cancelled:
+            return self.token.reason
+        if self.budget is not None and self.remaining() <= 0:
+            return "time budget exceeded"
+        return None
+
+    def check(self, stage: str):
+        """
+        Raise ``DeadlineExceeded`` if the run must stop before ``stage``.
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"{stage}: {self.reason}")
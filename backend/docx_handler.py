@@ -16,6 +16,9 @@ class DocxHandler:
     """
 
     CITE_PATTERN = re.compile(r"\[CITE:\s*(.*?)\s*\|\s*(.*?)\]")
+    # Separates references inside one grouped marker:
+    # [CITE: a.pdf; b.pdf | 0.82; 0.79]
+    GROUP_SEPARATOR = "; "
 
     # -----------------------------
     # READ
@@ -24,6 +27,27 @@ class DocxHandler:
         document = Document(docx_path)
         return [p.text.strip() for p in document.paragraphs if p.text.strip()]
 
+    def read_paragraph_records(self, docx_path: str) -> List[Dict]:
+        """
+        Read non-empty paragraphs with their position in
+        ``document.paragraphs`` and their style name.
+        """
+        document = Document(docx_path)
+        records = []
+
+        for idx, p in enumerate(document.paragraphs):
+            text = p.text.strip()
+            if not text:
+                continue
+
+            records.append({
+                "index": idx,
+                "text": text,
+                "style": p.style.name if p.style is not None else ""
+            })
+
+        return records
+
     # -----------------------------
     # WRITE (Markers)
     # -----------------------------
@@ -43,7 +67,13 @@ class DocxHandler:
             if not decision.get("citation_required"):
                 continue
 
-            marker = f" [CITE: {decision['reference_id']} | {decision['confidence_score']}]"
+            ref_ids = decision.get("reference_ids") or [decision["reference_id"]]
+            scores = decision.get("confidence_scores") or [decision["confidence_score"]]
+
+            marker = (
+                f" [CITE: {self.GROUP_SEPARATOR.join(ref_ids)} | "
+                f"{self.GROUP_SEPARATOR.join(str(s) for s in scores)}]"
+            )
             paragraph.add_run(marker)
 
         document.save(output_docx)
@@ -64,6 +94,7 @@ class DocxHandler:
         bibliography_builder = BibliographyBuilder(style=citation_style)
 
         used_refs = []
+        numbered: Dict[str, Dict] = {}
 
         for paragraph in document.paragraphs:
             matches = list(self.CITE_PATTERN.finditer(paragraph.text))
@@ -73,18 +104,25 @@ class DocxHandler:
             new_text = paragraph.text
 
             for match in matches:
-                ref_id = match.group(1).strip()
-                if ref_id not in reference_metadata:
+                ref_ids = [
+                    ref_id.strip()
+                    for ref_id in match.group(1).split(self.GROUP_SEPARATOR)
+                    if ref_id.strip() in reference_metadata
+                ]
+                if not ref_ids:
                     continue
 
-                citation = citation_engine.format_in_text(
-                    ref_id, reference_metadata[ref_id]
-                )
+                for ref_id in ref_ids:
+                    if ref_id not in used_refs:
+                        used_refs.append(ref_id)
+                        # IEEE numbers follow order of first use
+                        numbered[ref_id] = dict(
+                            reference_metadata[ref_id], index=len(used_refs)
+                        )
 
-                new_text = new_text.replace(match.group(0), citation)
+                citation = citation_engine.format_group(ref_ids, numbered)
 
-                if ref_id not in used_refs:
-                    used_refs.append(ref_id)
+                new_text = new_text.replace(match.group(0), citation)
 
             paragraph.clear()
             run = paragraph.add_run(new_text)
@@ -1,21 +1,140 @@
-from typing import List, Dict
+import json
+import os
+import threading
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 
+from backend.chunk_store import ChunkStore
+from backend.deadline import Deadline
+from backend.encoder_pool import ParallelEncoder
+
+# One loaded model per name for the whole process, shared by every
+# engine; its lock serialises encodes (tokenizers are not thread-safe)
+_MODELS: Dict[str, Tuple[SentenceTransformer, threading.Lock]] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def shared_model(model_name: str) -> Tuple[SentenceTransformer, threading.Lock]:
+    """
+    Process-wide (model, lock) pair for ``model_name``, loaded once.
+    """
+    with _MODELS_LOCK:
+        if model_name not in _MODELS:
+            _MODELS[model_name] = (SentenceTransformer(model_name), threading.Lock())
+        return _MODELS[model_name]
+
+
+class IndexSnapshot:
+    """
+    An index and the chunk metadata it was built with.
+
+    Never modified after publication except for caches derived from
+    it, so readers holding a snapshot are unaffected by rebuilds.
+    """
+
+    def __init__(self, index: faiss.Index, chunk_metadata: ChunkStore):
+        self.index = index
+        self.chunk_metadata = chunk_metadata
+        self.reference_centroids: Optional[np.ndarray] = None
+        self.selectors: Dict[frozenset, Tuple] = {}
+        self.lock = threading.Lock()
+
 
 class EmbeddingEngine:
     """
     Generates embeddings for text chunks
     and performs similarity search using FAISS.
+
+    Safe to share between threads: searches run against the snapshot
+    current when they start, and ``build_index`` / ``load_index``
+    publish a new snapshot with a single reference swap.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
-        self.index = None
-        self.chunk_metadata = []
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        num_workers: int = 0,
+        token_budget: int = 8192,
+        centroids_per_reference: int = 1,
+        window_overlap: int = 32
+    ):
+        """
+        :param num_workers: Encoder processes used by ``build_index``
+                            (0 → encode in this process)
+        :param token_budget: Max padded tokens per encode batch
+        :param centroids_per_reference: Summary vectors per reference
+                                        for coarse-to-fine search
+        :param window_overlap: Tokens shared by consecutive windows of
+                               texts longer than the model's max length
+        """
+        self.model_name = model_name
+        self.encoder = ParallelEncoder(
+            model_name,
+            num_workers=num_workers,
+            token_budget=token_budget
+        )
+        self.centroids_per_reference = centroids_per_reference
+        self.window_overlap = window_overlap
+        self._snapshot: Optional[IndexSnapshot] = None
+        # Serialises writers only; readers never take it
+        self._build_lock = threading.Lock()
+
+    @property
+    def model(self) -> SentenceTransformer:
+        """
+        Load the encoder on first use, so runs that only reuse
+        earlier decisions never pay for it.
+        """
+        return shared_model(self.model_name)[0]
+
+    @property
+    def model_lock(self) -> threading.Lock:
+        return shared_model(self.model_name)[1]
+
+    def close(self):
+        """
+        Shut down the encoder process pool (recreated on next build).
+        """
+        self.encoder.close()
+
+    def __del__(self):
+        encoder = getattr(self, "encoder", None)
+        if encoder is not None:
+            encoder.close()
+
+    # -----------------------------
+    # SNAPSHOTS
+    # -----------------------------
+    def snapshot(self) -> IndexSnapshot:
+        """
+        The current index snapshot. Search with it and look hits up in
+        its ``chunk_metadata`` so both come from the same build.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("FAISS index not built")
+        return snapshot
+
+    @property
+    def index(self) -> Optional[faiss.Index]:
+        snapshot = self._snapshot
+        return snapshot.index if snapshot is not None else None
+
+    @property
+    def chunk_metadata(self) -> ChunkStore:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return ChunkStore.from_chunks([])[0]
+        return snapshot.chunk_metadata
 
-    def build_index(self, chunks: List[Dict]):
+    @property
+    def reference_centroids(self) -> Optional[np.ndarray]:
+        snapshot = self._snapshot
+        return snapshot.reference_centroids if snapshot is not None else None
+
+    def build_index(self, chunks: List[Dict], deadline: Optional[Deadline] = None):
         """
         Build FAISS index from chunk texts.
 
@@ -27,55 +146,461 @@ class EmbeddingEngine:
                 "text": "..."
             }
         ]
+
+        Metadata is kept in a columnar ``ChunkStore``; chunks are
+        grouped by reference, so FAISS ids follow the store's row order.
+        Chunks longer than the model's max sequence length are indexed
+        as several token windows instead of being truncated.
+        Searches keep using the previous snapshot until this one is
+        complete. If ``deadline`` expires while encoding, raises
+        ``DeadlineExceeded`` and keeps the previous snapshot.
         """
-        texts = [chunk["text"] for chunk in chunks]
+        with self._build_lock:
+            model, lock = shared_model(self.model_name)
 
-        embeddings = self.model.encode(
-            texts,
-            convert_to_numpy=True,
-            show_progress_bar=True
-        )
+            # One length pass serves windowing and batching
+            lengths = self.encoder.token_lengths(
+                [c["text"] for c in chunks], model, lock
+            )
+            chunks, lengths = self._split_long_chunks(chunks, lengths)
+            store, order = ChunkStore.from_chunks(chunks)
+            texts = [chunks[i]["text"] for i in order]
 
-        # Normalize embeddings for cosine similarity
-        embeddings = self._normalize(embeddings)
+            embeddings = self.encoder.encode(
+                texts, model, lock=lock, deadline=deadline,
+                lengths=lengths[order]
+            )
 
-        dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dimension)
-        self.index.add(embeddings)
+            # Normalize embeddings for cosine similarity
+            embeddings = self._normalize(embeddings)
 
-        self.chunk_metadata = chunks
+            dimension = embeddings.shape[1]
+            index = faiss.IndexFlatIP(dimension)
+            index.add(embeddings)
 
-    def search(self, query_text: str, top_k: int = 5) -> List[Dict]:
+            snapshot = IndexSnapshot(index, store)
+            self._centroids(snapshot)
+
+            self._snapshot = snapshot
+
+    def rebuild_in_background(self, chunks: List[Dict]) -> threading.Thread:
         """
-        Search for most similar chunks to the query text.
+        Run ``build_index`` on a daemon thread while searches continue
+        against the current snapshot.
         """
-        if self.index is None:
-            raise RuntimeError("FAISS index not built")
-
-        query_embedding = self.model.encode(
-            [query_text],
-            convert_to_numpy=True
+        thread = threading.Thread(
+            target=self.build_index, args=(chunks,), daemon=True
         )
+        thread.start()
+        return thread
 
-        query_embedding = self._normalize(query_embedding)
+    def search(self, query_text: str, top_k: int = 5) -> List[Dict]:
+        """
+        Search for most similar chunks to the query text.
+        """
+        snapshot = self.snapshot()
 
-        scores, indices = self.index.search(query_embedding, top_k)
+        scores, indices = self.search_batch([query_text], top_k, snapshot=snapshot)
 
         results = []
         for score, idx in zip(scores[0], indices[0]):
             if idx == -1:
                 continue
 
-            chunk = self.chunk_metadata[idx]
-            results.append({
-                "reference_id": chunk["reference_id"],
-                "chunk_id": chunk["chunk_id"],
-                "text": chunk["text"],
-                "similarity_score": float(score)
-            })
+            chunk = snapshot.chunk_metadata[idx]
+            chunk["similarity_score"] = float(score)
+            results.append(chunk)
 
         return results
 
+    def search_batch(
+        self,
+        query_texts: List[str],
+        top_k: int = 5,
+        allowed_references: Optional[List[str]] = None,
+        top_r: Optional[int] = None,
+        snapshot: Optional[IndexSnapshot] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encode all queries in one call and search them together.
+
+        Queries longer than the model's max sequence length are split
+        into token windows, all encoded in the same call; each chunk
+        keeps its best score over a query's windows.
+
+        ``allowed_references`` restricts scoring to chunks of those
+        references via a FAISS id selector on the shared index.
+        ``top_r`` enables coarse-to-fine search (see ``search_embeddings``).
+
+        Returns the raw FAISS (scores, indices) matrices, shape
+        (len(query_texts), top_k); row ids index the snapshot's
+        ``chunk_metadata`` (the current one unless ``snapshot`` is given).
+        """
+        snapshot = snapshot or self.snapshot()
+        windows, owners = self.query_windows(query_texts)
+
+        scores, indices = self.search_embeddings(
+            self.encode_queries(windows),
+            top_k=top_k,
+            allowed_references=allowed_references,
+            top_r=top_r,
+            snapshot=snapshot
+        )
+
+        if len(windows) == len(query_texts):
+            return scores, indices
+
+        return self._pool_windows(scores, indices, owners, len(query_texts), top_k)
+
+    def query_windows(self, texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Token-bounded windows of ``texts`` and the text index of each
+        (see ``ParallelEncoder.token_windows``).
+        """
+        model, lock = shared_model(self.model_name)
+
+        # The shared model's tokenizer is not thread-safe: lock per slice
+        return self.encoder.token_windows(
+            texts, model, self.window_overlap, lock=lock
+        )
+
+    def encode_queries(self, query_texts: List[str]) -> np.ndarray:
+        """
+        Encode and normalise query texts in one call.
+        """
+        model, lock = shared_model(self.model_name)
+
+        with lock:
+            query_embeddings = model.encode(
+                query_texts,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+
+        return self._normalize(query_embeddings)
+
+    def search_embeddings(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 5,
+        allowed_references: Optional[List[str]] = None,
+        top_r: Optional[int] = None,
+        snapshot: Optional[IndexSnapshot] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search normalised query embeddings.
+
+        With ``top_r`` set, each query is first scored against the
+        per-reference centroid vectors and only the chunks of its
+        ``top_r`` best references are searched.
+        """
+        snapshot = snapshot or self.snapshot()
+
+        n_queries = len(query_embeddings)
+        n_refs = len(snapshot.chunk_metadata.reference_ids)
+
+        if top_r is not None and top_r < n_refs:
+            return self._hierarchical_search(
+                snapshot, query_embeddings, top_k, top_r, allowed_references
+            )
+
+        params = None
+        if allowed_references is not None:
+            params = self._search_params(snapshot, allowed_references)
+            if params is None:
+                # None of the allowed references are in the index
+                return self._empty_result(n_queries, top_k)
+
+        return snapshot.index.search(query_embeddings, top_k, params=params)
+
+    # -----------------------------
+    # LONG TEXTS
+    # -----------------------------
+    def _split_long_chunks(
+        self,
+        chunks: List[Dict],
+        lengths: np.ndarray
+    ) -> Tuple[List[Dict], np.ndarray]:
+        """
+        Replace over-length chunks by one chunk per token window;
+        chunk ids are then renumbered within each reference.
+
+        ``lengths`` are the chunks' ``token_lengths``; returns the new
+        chunks and their lengths (windows count as the max length).
+        """
+        model, lock = shared_model(self.model_name)
+        windows, owners = self.encoder.token_windows(
+            [c["text"] for c in chunks], model, self.window_overlap,
+            lock=lock, lengths=lengths
+        )
+        if len(windows) == len(chunks):
+            return chunks, lengths
+
+        split = []
+        running: Dict[str, int] = {}
+
+        for window, owner in zip(windows, owners):
+            ref_id = chunks[owner]["reference_id"]
+            ordinal = running.get(ref_id, 0)
+            running[ref_id] = ordinal + 1
+
+            split.append(dict(
+                chunks[owner],
+                chunk_id=f"{ref_id}_chunk_{ordinal}",
+                text=window
+            ))
+
+        return split, lengths[owners]
+
+    @staticmethod
+    def _pool_windows(
+        scores: np.ndarray,
+        indices: np.ndarray,
+        owners: np.ndarray,
+        n_queries: int,
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Merge per-window hits into per-query rows: best score per
+        chunk over the query's windows, top_k by descending score.
+        """
+        pooled_scores, pooled_indices = EmbeddingEngine._empty_result(n_queries, top_k)
+        bounds = np.searchsorted(owners, np.arange(n_queries + 1))
+
+        for query in range(n_queries):
+            rows = slice(bounds[query], bounds[query + 1])
+            ids = indices[rows].ravel()
+            sims = scores[rows].ravel()
+
+            valid = ids >= 0
+            ids, sims = ids[valid], sims[valid]
+            if len(ids) == 0:
+                continue
+
+            # Keep each chunk's best hit
+            order = np.lexsort((-sims, ids))
+            ids, sims = ids[order], sims[order]
+            first = np.ones(len(ids), dtype=bool)
+            first[1:] = ids[1:] != ids[:-1]
+            ids, sims = ids[first], sims[first]
+
+            best = np.argsort(-sims, kind="stable")[:top_k]
+            pooled_scores[query, :len(best)] = sims[best]
+            pooled_indices[query, :len(best)] = ids[best]
+
+        return pooled_scores, pooled_indices
+
+    # -----------------------------
+    # COARSE-TO-FINE SEARCH
+    # -----------------------------
+    def _centroids(self, snapshot: IndexSnapshot) -> np.ndarray:
+        """
+        Summarise each reference by ``centroids_per_reference`` unit
+        vectors (its mean, or spherical k-means centres of its chunks).
+        Computed once per snapshot.
+        """
+        if snapshot.reference_centroids is not None:
+            return snapshot.reference_centroids
+
+        with snapshot.lock:
+            if snapshot.reference_centroids is not None:
+                return snapshot.reference_centroids
+
+            store = snapshot.chunk_metadata
+            vectors = self._vectors(snapshot.index)
+            k = self.centroids_per_reference
+            bounds = store.reference_offsets
+
+            centroids = np.zeros(
+                (len(store.reference_ids) * k, vectors.shape[1]), dtype=np.float32
+            )
+
+            for code in range(len(store.reference_ids)):
+                ref_vectors = vectors[bounds[code]:bounds[code + 1]]
+
+                if k == 1 or len(ref_vectors) <= k:
+                    # Pad small references by repeating their chunk vectors
+                    centres = np.resize(
+                        ref_vectors if k > 1 else ref_vectors.mean(axis=0, keepdims=True),
+                        (k, vectors.shape[1])
+                    )
+                else:
+                    kmeans = faiss.Kmeans(
+                        vectors.shape[1], k, niter=10, spherical=True,
+                        seed=code, min_points_per_centroid=1
+                    )
+                    kmeans.train(np.ascontiguousarray(ref_vectors))
+                    centres = kmeans.centroids
+
+                centroids[code * k:(code + 1) * k] = centres
+
+            snapshot.reference_centroids = self._normalize(centroids)
+
+        return snapshot.reference_centroids
+
+    def _hierarchical_search(
+        self,
+        snapshot: IndexSnapshot,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        top_r: int,
+        allowed_references: Optional[List[str]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        store = snapshot.chunk_metadata
+        vectors = self._vectors(snapshot.index)
+        bounds = store.reference_offsets
+        n_refs = len(store.reference_ids)
+        k = self.centroids_per_reference
+
+        reference_centroids = self._centroids(snapshot)
+
+        # Coarse: best centroid score per reference
+        ref_scores = (query_embeddings @ reference_centroids.T)
+        ref_scores = ref_scores.reshape(len(query_embeddings), n_refs, k).max(axis=2)
+
+        if allowed_references is not None:
+            allowed = set(allowed_references)
+            blocked = [
+                code for code, ref_id in enumerate(store.reference_ids)
+                if ref_id not in allowed
+            ]
+            ref_scores[:, blocked] = -np.inf
+
+        top_r = min(top_r, n_refs)
+        selected = np.argpartition(-ref_scores, top_r - 1, axis=1)[:, :top_r]
+
+        scores, indices = self._empty_result(len(query_embeddings), top_k)
+
+        # Fine: exact scores over the selected references' chunks only
+        for row, query in enumerate(query_embeddings):
+            codes = [c for c in selected[row] if np.isfinite(ref_scores[row, c])]
+            if not codes:
+                continue
+
+            ids = np.concatenate([np.arange(bounds[c], bounds[c + 1]) for c in codes])
+            sims = np.concatenate([vectors[bounds[c]:bounds[c + 1]] @ query for c in codes])
+
+            n = min(top_k, len(ids))
+            best = np.argpartition(-sims, n - 1)[:n]
+            best = best[np.argsort(-sims[best], kind="stable")]
+
+            scores[row, :n] = sims[best]
+            indices[row, :n] = ids[best]
+
+        return scores, indices
+
+    @staticmethod
+    def _vectors(index: faiss.Index) -> np.ndarray:
+        """
+        Zero-copy (ntotal x d) view of a flat index's vectors.
+        """
+        return faiss.rev_swig_ptr(
+            index.get_xb(), index.ntotal * index.d
+        ).reshape(index.ntotal, index.d)
+
+    @staticmethod
+    def _empty_result(n_queries: int, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return (
+            np.full((n_queries, top_k), -np.inf, dtype=np.float32),
+            np.full((n_queries, top_k), -1, dtype=np.int64)
+        )
+
+    def _search_params(
+        self, snapshot: IndexSnapshot, allowed_references: List[str]
+    ) -> Optional[faiss.SearchParameters]:
+        """
+        FAISS search parameters limiting ids to the allowed references.
+
+        Chunks are grouped per reference, so a single reference is one
+        id range; larger subsets use a bitmap over all ids. Selectors
+        are cached per subset, so repeated documents cost nothing.
+        """
+        key = frozenset(allowed_references)
+        cached = snapshot.selectors.get(key)
+        if cached is not None:
+            return cached[0]
+
+        store = snapshot.chunk_metadata
+        codes = [
+            code for code, ref_id in enumerate(store.reference_ids)
+            if ref_id in key
+        ]
+        if not codes:
+            return None
+
+        bounds = store.reference_offsets
+        if len(codes) == 1:
+            bitmap = None
+            selector = faiss.IDSelectorRange(
+                int(bounds[codes[0]]), int(bounds[codes[0] + 1])
+            )
+        else:
+            allowed = np.zeros(len(store), dtype=bool)
+            for code in codes:
+                allowed[bounds[code]:bounds[code + 1]] = True
+            bitmap = np.packbits(allowed, bitorder="little")
+            selector = faiss.IDSelectorBitmap(len(store), faiss.swig_ptr(bitmap))
+
+        params = faiss.SearchParameters(sel=selector)
+        # Keep selector and bitmap alive as long as the params are cached;
+        # concurrent misses may both build, the first one stored wins
+        return snapshot.selectors.setdefault(key, (params, selector, bitmap))[0]
+
+    def save_index(self, directory: str, version: Optional[str] = None):
+        """
+        Persist the FAISS index and chunk metadata to a directory,
+        tagged with ``version`` (e.g. the corpus version it was built
+        from). The tag is removed first and written last, so an
+        interrupted save never looks like a valid index.
+        """
+        snapshot = self.snapshot()
+        version_path = os.path.join(directory, "version.json")
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(version_path):
+            os.remove(version_path)
+
+        index_path = os.path.join(directory, "index.faiss")
+        tmp_index_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        faiss.write_index(snapshot.index, tmp_index_path)
+        os.replace(tmp_index_path, index_path)
+        snapshot.chunk_metadata.save(directory)
+
+        tmp_path = f"{version_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version}, f)
+        os.replace(tmp_path, version_path)
+
+    def load_index(self, directory: str, version: Optional[str] = None) -> bool:
+        """
+        Load an index saved by ``save_index``; chunk metadata is
+        memory-mapped. Returns False if the directory does not hold a
+        complete one, or (when ``version`` is given) one saved with a
+        different version.
+        """
+        index_path = os.path.join(directory, "index.faiss")
+
+        if not (os.path.exists(index_path) and ChunkStore.exists(directory)):
+            return False
+
+        try:
+            with open(os.path.join(directory, "version.json"), "r", encoding="utf-8") as f:
+                saved_version = json.load(f)["version"]
+        except (OSError, ValueError, KeyError):
+            return False
+
+        if version is not None and saved_version != version:
+            return False
+
+        with self._build_lock:
+            # Centroids are rebuilt lazily on first coarse-to-fine search
+            self._snapshot = IndexSnapshot(
+                faiss.read_index(index_path),
+                ChunkStore.load(directory, mmap=True)
+            )
+
+        return True
+
     @staticmethod
     def _normalize(vectors: np.ndarray) -> np.ndarray:
         norms = np.linalg.norm(vectors, axis=1, keepdims=True)
@@ -0,0 +1,299 @@
+import contextlib
+import multiprocessing as mp
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.deadline import Deadline
+
+# Per-process encoder, created by _init_worker in each pool process
+_worker_model = None
+
+
+def _init_worker(model_name: str, num_threads: int):
+    global _worker_model
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already fixed for this process
+
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+
+
+class ParallelEncoder:
+    """
+    CPU encoding with length-bucketed dynamic batching.
+
+    Inputs are sorted by token length and cut into batches whose
+    padded size (batch size x longest input) stays under a token
+    budget, so short chunks are never padded to the length of long
+    ones. Batches are fanned out to a pool of encoder processes, each
+    with a pinned torch thread count, and results are returned in the
+    original input order.
+    """
+
+    # Texts tokenized per call (and per hold of a shared model's lock)
+    TOKENIZE_SLICE = 1024
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        num_workers: int = 0,
+        threads_per_worker: Optional[int] = None,
+        token_budget: int = 8192,
+        max_batch_size: int = 256
+    ):
+        """
+        :param num_workers: Encoder processes (0 or 1 → encode in-process)
+        :param threads_per_worker: torch threads per process
+                                   (default: cores / workers)
+        :param token_budget: Max padded tokens per batch
+        :param max_batch_size: Hard cap on inputs per batch
+        """
+        self.model_name = model_name
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(
+            (os.cpu_count() or 1) // max(num_workers, 1), 1
+        )
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self._executor = None
+
+    def encode(
+        self,
+        texts: List[str],
+        model,
+        lock=None,
+        deadline: Optional[Deadline] = None,
+        lengths: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Encode ``texts`` (unnormalised embeddings, input order).
+
+        ``model`` is the caller's SentenceTransformer; its tokenizer
+        measures lengths, and it encodes when no pool is used.
+        ``lock`` guards every use of a shared ``model``; it is taken
+        per tokenizer slice and per batch, so concurrent query encodes
+        interleave with a build.
+        ``deadline`` is checked between batches (``DeadlineExceeded``).
+        ``lengths`` (from ``token_lengths``) skips measuring again.
+        """
+        lock = lock or contextlib.nullcontext()
+
+        if not texts:
+            dim = model.get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=np.float32)
+
+        if lengths is None:
+            lengths = self.token_lengths(texts, model, lock)
+        batches = self.make_batches(lengths)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+
+        if self.num_workers > 1:
+            results = self._get_executor().map(_encode_batch, batch_texts)
+        else:
+            results = (
+                self._encode_locked(model, b, lock) for b in batch_texts
+            )
+
+        embeddings = None
+        for batch, batch_embeddings in zip(batches, results):
+            if deadline is not None and deadline.expired:
+                self._abandon()
+                deadline.check("encoding")
+
+            if embeddings is None:
+                embeddings = np.empty(
+                    (len(texts), batch_embeddings.shape[1]),
+                    dtype=batch_embeddings.dtype
+                )
+            embeddings[batch] = batch_embeddings
+
+        return embeddings
+
+    @staticmethod
+    def _encode_locked(model, texts: List[str], lock) -> np.ndarray:
+        with lock:
+            return model.encode(
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+
+    def token_lengths(self, texts: List[str], model, lock=None) -> np.ndarray:
+        """
+        Token count per text, capped at the model's max sequence length.
+
+        Texts are tokenized ``TOKENIZE_SLICE`` at a time, taking
+        ``lock`` per slice, so neither the token ids nor the lock are
+        held for the whole corpus at once.
+        """
+        lock = lock or contextlib.nullcontext()
+        max_length = getattr(model, "max_seq_length", None) or 512
+        tokenizer = getattr(model, "tokenizer", None)
+
+        if tokenizer is None:
+            # Rough word-piece estimate
+            return np.array(
+                [min(int(len(t.split()) * 1.3) + 2, max_length) for t in texts]
+            )
+
+        lengths = np.empty(len(texts), dtype=np.int64)
+        for start in range(0, len(texts), self.TOKENIZE_SLICE):
+            with lock:
+                input_ids = tokenizer(
+                    texts[start:start + self.TOKENIZE_SLICE],
+                    add_special_tokens=True,
+                    truncation=True,
+                    max_length=max_length,
+                    return_attention_mask=False,
+                    return_token_type_ids=False
+                )["input_ids"]
+            lengths[start:start + len(input_ids)] = [len(ids) for ids in input_ids]
+
+        return lengths
+
+    def token_windows(
+        self,
+        texts: List[str],
+        model,
+        overlap: int = 32,
+        lock=None,
+        lengths: Optional[np.ndarray] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Split texts longer than the model's max sequence length into
+        overlapping windows that each fit, so no tail is truncated.
+
+        Only texts whose ``lengths`` (from ``token_lengths``, measured
+        here if not given) reach the max length are tokenized again
+        with offsets, ``TOKENIZE_SLICE`` at a time, taking ``lock`` per
+        slice.
+
+        Returns (windows, owners): texts that fit are passed through
+        unchanged, and ``owners[i]`` is the input index of window i
+        (non-decreasing).
+        """
+        lock = lock or contextlib.nullcontext()
+        max_length = getattr(model, "max_seq_length", None) or 512
+        tokenizer = getattr(model, "tokenizer", None)
+
+        if lengths is None:
+            lengths = self.token_lengths(texts, model, lock)
+        long_texts = np.flatnonzero(np.asarray(lengths) >= max_length)
+        if not len(long_texts):
+            return list(texts), np.arange(len(texts), dtype=np.int64)
+
+        budget = max_length - 2  # room for [CLS] / [SEP]
+        stride = max(budget - overlap, 1)
+        use_offsets = tokenizer is not None and getattr(tokenizer, "is_fast", False)
+        if not use_offsets:
+            # No offsets available: rough word-piece estimate per word
+            budget = max(int(budget / 1.3), 1)
+            stride = max(int(stride / 1.3), 1)
+
+        split: Dict[int, List[str]] = {}
+        for start in range(0, len(long_texts), self.TOKENIZE_SLICE):
+            positions = long_texts[start:start + self.TOKENIZE_SLICE].tolist()
+
+            if use_offsets:
+                with lock:
+                    spans = tokenizer(
+                        [texts[i] for i in positions],
+                        add_special_tokens=False,
+                        return_offsets_mapping=True,
+                        return_attention_mask=False,
+                        return_token_type_ids=False,
+                        verbose=False
+                    )["offset_mapping"]
+            else:
+                spans = [
+                    [(m.start(), m.end()) for m in re.finditer(r"\S+", texts[i])]
+                    for i in positions
+                ]
+
+            # Keep only the window strings, not the offsets
+            for i, offsets in zip(positions, spans):
+                if len(offsets) > budget:
+                    split[i] = self._windows(texts[i], offsets, budget, stride)
+
+        windows: List[str] = []
+        owners: List[int] = []
+        for i, text in enumerate(texts):
+            parts = split.get(i, [text])
+            windows.extend(parts)
+            owners.extend([i] * len(parts))
+
+        return windows, np.array(owners, dtype=np.int64)
+
+    @staticmethod
+    def _windows(text: str, offsets, budget: int, stride: int) -> List[str]:
+        windows = []
+        for start in range(0, len(offsets), stride):
+            window = offsets[start:start + budget]
+            windows.append(text[window[0][0]:window[-1][1]])
+            if start + budget >= len(offsets):
+                break
+        return windows
+
+    def make_batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """
+        Group input positions into length-sorted batches that fit
+        the token budget.
+        """
+        order = np.argsort(lengths, kind="stable")
+        batches = []
+        start = 0
+
+        for end in range(1, len(order) + 1):
+            size = end - start
+            full = size >= self.max_batch_size
+
+            if end < len(order):
+                next_padded = (size + 1) * lengths[order[end]]
+                full = full or next_padded > self.token_budget
+
+            if full or end == len(order):
+                batches.append(order[start:end])
+                start = end
+
+        return batches
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _abandon(self):
+        # Drop queued pool batches; the pool is recreated on next use
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.threads_per_worker)
+            )
+        return self._executor
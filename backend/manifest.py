@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+
+class CitationManifest:
+    """
+    Per-output record of paragraph fingerprints and citation decisions.
+
+    Stored next to the output DOCX so that a revised manuscript can
+    reuse decisions for unchanged paragraphs as long as the reference
+    corpus (and the matching settings) are unchanged.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, corpus_version: str = ""):
+        self.path = path
+        self.corpus_version = corpus_version
+        # paragraph hash -> decision (None when no citation was needed)
+        self.paragraphs: Dict[str, Optional[Dict]] = {}
+
+    # -----------------------------
+    # PATHS / HASHES
+    # -----------------------------
+    @staticmethod
+    def manifest_path_for(output_docx: str) -> str:
+        return f"{output_docx}.manifest.json"
+
+    @staticmethod
+    def index_dir_for(output_docx: str) -> str:
+        return f"{output_docx}.index"
+
+    @staticmethod
+    def paragraph_hash(text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def corpus_version(
+        pdf_paths: List[str],
+        settings: Dict,
+        reference_ids: Optional[List[str]] = None
+    ) -> str:
+        """
+        Fingerprint of the reference PDFs (id + content) and of the
+        settings that influence decisions.
+        """
+        if reference_ids is None:
+            reference_ids = [os.path.basename(path) for path in pdf_paths]
+
+        digest = hashlib.sha256()
+
+        for ref_id, path in sorted(zip(reference_ids, pdf_paths)):
+            digest.update(ref_id.encode("utf-8"))
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+
+        digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    # -----------------------------
+    # LOAD / SAVE
+    # -----------------------------
+    @classmethod
+    def load(cls, path: str) -> Optional["CitationManifest"]:
+        """
+        Load a manifest, or None if missing, unreadable or outdated.
+        """
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != cls.VERSION:
+            return None
+
+        manifest = cls(path, data.get("corpus_version", ""))
+        manifest.paragraphs = data.get("paragraphs", {})
+        return manifest
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "corpus_version": self.corpus_version,
+                    "paragraphs": self.paragraphs
+                },
+                f,
+                separators=(",", ":")
+            )
+        os.replace(tmp_path, self.path)
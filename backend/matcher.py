@@ -1,15 +1,40 @@
 from typing import List, Dict
 
+import numpy as np
+
 
 class CitationMatcher:
     """
     Decides whether a citation should be added
     based on similarity search results.
+
+    Holds configuration only, so one matcher can serve concurrent
+    requests.
     """
 
-    def __init__(self, similarity_threshold: float = 0.75):
+    AGGREGATIONS = ("max", "top_n_mean", "count")
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.75,
+        max_references: int = 1,
+        aggregation: str = "max",
+        top_n: int = 2
+    ):
+        """
+        :param similarity_threshold: Minimum aggregated score to cite
+        :param max_references: Max references cited per paragraph
+        :param aggregation: Per-reference score used for ranking:
+                            "max", "top_n_mean" or "count"
+        :param top_n: Hits averaged by "top_n_mean"
+        """
+        if aggregation not in self.AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}")
+
         self.similarity_threshold = similarity_threshold
-        self.recent_references = []
+        self.max_references = max_references
+        self.aggregation = aggregation
+        self.top_n = top_n
 
     def decide(self, similarity_results: List[Dict]) -> Dict:
         """
@@ -36,6 +61,100 @@ class CitationMatcher:
             "reason": "Best semantic match"
         }
 
+    def decide_batch(
+        self,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        ref_codes: np.ndarray,
+        reference_ids: List[str]
+    ) -> List[Dict]:
+        """
+        Decide citations for a batch of queries straight from the
+        FAISS score/index matrices (shape: queries x top_k, rows sorted
+        by descending score).
+
+        Hits are grouped per (query, reference) with NumPy to get the
+        max score, top-n mean and hit count of each reference; up to
+        ``max_references`` references above threshold are cited.
+        """
+        n_queries = scores.shape[0]
+        n_refs = max(len(reference_ids), 1)
+
+        rows, cols = np.nonzero(indices >= 0)
+        if len(rows) == 0:
+            return [
+                self._no_citation("No match above threshold")
+                for _ in range(n_queries)
+            ]
+
+        hit_scores = scores[rows, cols]
+        keys = rows.astype(np.int64) * n_refs + ref_codes[indices[rows, cols]]
+
+        # Group hits by (query, reference); stable sort keeps each
+        # group's hits in descending score order
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        hit_scores = hit_scores[order]
+
+        group_keys, starts, counts = np.unique(
+            keys, return_index=True, return_counts=True
+        )
+        group_max = np.maximum.reduceat(hit_scores, starts)
+
+        rank = np.arange(len(keys)) - np.repeat(starts, counts)
+        in_top = rank < self.top_n
+        top_sum = np.bincount(
+            np.repeat(np.arange(len(group_keys)), counts)[in_top],
+            weights=hit_scores[in_top],
+            minlength=len(group_keys)
+        )
+        group_mean = top_sum / np.minimum(counts, self.top_n)
+
+        # "count" ranks by hit count but still thresholds on max score
+        group_score = group_mean if self.aggregation == "top_n_mean" else group_max
+
+        group_rows = group_keys // n_refs
+        group_refs = group_keys % n_refs
+
+        keep = group_score >= self.similarity_threshold
+        group_rows = group_rows[keep]
+        group_refs = group_refs[keep]
+        group_score = group_score[keep]
+        counts = counts[keep]
+
+        if self.aggregation == "count":
+            ranking = np.lexsort((-group_score, -counts, group_rows))
+        else:
+            ranking = np.lexsort((-counts, -group_score, group_rows))
+
+        decisions: List[Dict] = [None] * n_queries
+        row_starts = np.searchsorted(group_rows[ranking], np.arange(n_queries + 1))
+
+        for row in range(n_queries):
+            picked = ranking[row_starts[row]:row_starts[row + 1]][:self.max_references]
+
+            if len(picked) == 0:
+                decisions[row] = self._no_citation("No match above threshold")
+                continue
+
+            ref_list = [reference_ids[c] for c in group_refs[picked]]
+            score_list = [round(float(s), 3) for s in group_score[picked]]
+
+            decisions[row] = {
+                "citation_required": True,
+                "reference_id": ref_list[0],
+                "reference_ids": ref_list,
+                "confidence_score": score_list[0],
+                "confidence_scores": score_list,
+                "hit_counts": [int(c) for c in counts[picked]],
+                "reason": (
+                    "Multi-source match" if len(ref_list) > 1
+                    else "Best semantic match"
+                )
+            }
+
+        return decisions
+
     @staticmethod
     def _no_citation(reason: str) -> Dict:
         return {
@@ -0,0 +1,249 @@
+import hashlib
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from backend.deadline import Deadline
+
+
+def _ocr_page(pdf_path: str, page_number: int, dpi: int, lang: str) -> str:
+    """
+    Rasterise one page and run Tesseract on it (runs in a pool process).
+    """
+    import io
+
+    import pytesseract
+    from PIL import Image
+
+    with fitz.open(pdf_path) as doc:
+        pixmap = doc[page_number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        image = Image.open(io.BytesIO(pixmap.tobytes("png")))
+
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+class OCREngine:
+    """
+    OCR for scanned PDF pages.
+
+    Only pages without a text layer are rasterised (at ``dpi``) and
+    passed to Tesseract; pages are queued individually on a process
+    pool. Results are cached on disk per page hash (page content
+    stream + embedded images + OCR settings), so the same scan is
+    only ever OCR'd once, whichever file it arrives in. The cache is
+    kept under ``max_cache_bytes`` by evicting least recently used pages.
+    """
+
+    def __init__(
+        self,
+        dpi: int = 300,
+        lang: str = "eng",
+        num_workers: int = 0,
+        cache_dir: str = "storage/ocr_cache",
+        min_page_chars: int = 25,
+        max_cache_bytes: int = 256 << 20
+    ):
+        """
+        :param dpi: Rasterisation resolution
+        :param lang: Tesseract language(s), e.g. "eng+deu"
+        :param num_workers: OCR processes (0 → CPU count)
+        :param cache_dir: Per-page OCR text cache
+        :param min_page_chars: Pages with less embedded text are OCR'd
+        :param max_cache_bytes: Disk budget of the page cache
+        """
+        self.dpi = dpi
+        self.lang = lang
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.min_page_chars = min_page_chars
+        self.max_cache_bytes = max_cache_bytes
+        self._executor = None
+        self._cache_lock = threading.Lock()
+
+        # Totals across calls: pages OCR'd / served from cache, OCR time
+        self.stats = {"ocr_pages": 0, "cached_pages": 0, "seconds": 0.0}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def available() -> bool:
+        """
+        True if pytesseract and the Tesseract binary are installed.
+        """
+        try:
+            import pytesseract
+            pytesseract.get_tesseract_version()
+            return True
+        except Exception:
+            return False
+
+    # -----------------------------
+    # OCR
+    # -----------------------------
+    def textless_pages(self, doc) -> List[int]:
+        """
+        Page numbers whose embedded text layer is (nearly) empty.
+        """
+        return [
+            page.number for page in doc
+            if len(page.get_text().strip()) < self.min_page_chars
+        ]
+
+    def ocr_pages(
+        self,
+        pdf_path: str,
+        page_numbers: Optional[List[int]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[Dict[int, str], List[int]]:
+        """
+        OCR text per page number. Pass the ``page_numbers`` already
+        known to be text-less; the default re-reads every page's text
+        layer to find them.
+
+        Returns (texts, incomplete): pages not finished before
+        ``deadline`` expires are left out of ``texts`` and listed in
+        ``incomplete``, so callers can tell the text is partial.
+        """
+        with fitz.open(pdf_path) as doc:
+            if page_numbers is None:
+                page_numbers = self.textless_pages(doc)
+            keys = {n: self._page_key(doc, n) for n in page_numbers}
+
+        results = {}
+        todo = []
+        for number in page_numbers:
+            cached = self._read_cache(keys[number])
+            if cached is None:
+                todo.append(number)
+            else:
+                results[number] = cached
+
+        self.stats["cached_pages"] += len(results)
+        if not todo:
+            return results, []
+
+        start = time.perf_counter()
+        executor = self._get_executor()
+        futures = {
+            executor.submit(_ocr_page, pdf_path, number, self.dpi, self.lang): number
+            for number in todo
+        }
+
+        finished = set()
+        for future in as_completed(futures):
+            number = futures[future]
+            finished.add(number)
+            try:
+                text = future.result()
+                results[number] = text
+                self._write_cache(keys[number], text)
+                self.stats["ocr_pages"] += 1
+            except Exception as e:
+                print(f"[OCR] {os.path.basename(pdf_path)} page {number + 1}: {e}")
+
+            if deadline is not None and deadline.expired:
+                for pending in futures:
+                    pending.cancel()
+                break
+
+        incomplete = sorted(n for n in todo if n not in finished)
+
+        elapsed = time.perf_counter() - start
+        self.stats["seconds"] += elapsed
+        done = len(results) - (len(page_numbers) - len(todo))
+        print(
+            f"[OCR] {os.path.basename(pdf_path)}: {done}/{len(todo)} pages "
+            f"in {elapsed:.1f}s ({done / max(elapsed, 1e-9):.2f} pages/sec), "
+            f"{len(page_numbers) - len(todo)} cached"
+            + (f", {len(incomplete)} not finished" if incomplete else "")
+        )
+
+        if done:
+            self.trim_cache()
+
+        return results, incomplete
+
+    def trim_cache(self) -> int:
+        """
+        Evict least recently used cached pages until the cache fits in
+        ``max_cache_bytes``. Returns the number of bytes freed.
+        """
+        with self._cache_lock:
+            entries = []
+            for dirpath, _, filenames in os.walk(self.cache_dir):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            for _, size, path in sorted(entries):
+                if total - freed <= self.max_cache_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    freed += size
+                except FileNotFoundError:
+                    continue
+
+        return freed
+
+    def pages_per_second(self) -> float:
+        return self.stats["ocr_pages"] / max(self.stats["seconds"], 1e-9)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    # -----------------------------
+    # HELPERS
+    # -----------------------------
+    def _page_key(self, doc, number: int) -> str:
+        page = doc[number]
+        digest = hashlib.sha256(f"{self.dpi}|{self.lang}|".encode("utf-8"))
+        digest.update(page.read_contents())
+
+        for image in page.get_images(full=True):
+            digest.update(doc.xref_stream_raw(image[0]) or b"")
+
+        return digest.hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def _read_cache(self, key: str) -> Optional[str]:
+        path = self._cache_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path, None)  # mtime drives LRU eviction
+            return text
+        except OSError:
+            return None
+
+    def _write_cache(self, key: str, text: str):
+        path = self._cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=mp.get_context("spawn")
+            )
+        return self._executor
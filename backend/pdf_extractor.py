@@ -1,37 +1,158 @@
 import os
-from typing import Dict, List
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
 
 import fitz  # PyMuPDF
 import pdfplumber
 
+from backend.deadline import Deadline
+from backend.ocr_engine import OCREngine
+
 
 class PDFExtractor:
     """
     Extracts text from PDF files.
-    Works for text-based PDFs.
+    Works for text-based PDFs; pages without a text layer are OCR'd
+    when Tesseract is installed.
+
+    With ``strip_boilerplate`` enabled, text is rebuilt from PyMuPDF
+    block positions and running headers/footers, page numbers and the
+    trailing References/Bibliography section are dropped.
     """
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    REFERENCES_HEADING = re.compile(
+        r"^\s*(?:\d+\.?\s*)?(references|bibliography|works cited|"
+        r"literature cited|reference list)\s*:?\s*$",
+        re.IGNORECASE
+    )
+    PAGE_NUMBER = re.compile(
+        r"^\W*(?:page\s*)?\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?\W*$",
+        re.IGNORECASE
+    )
+
+    # Share of an extraction deadline after which PDFs take the fast path
+    FAST_PATH_AFTER = 0.5
+
+    def __init__(
+        self,
+        strip_boilerplate: bool = False,
+        header_band: float = 0.08,
+        footer_band: float = 0.08,
+        min_repeat_fraction: float = 0.3,
+        enable_ocr: bool = True,
+        ocr_engine: Optional[OCREngine] = None
+    ):
+        """
+        :param strip_boilerplate: Use layout-aware extraction
+        :param header_band: Top fraction of the page treated as header
+        :param footer_band: Bottom fraction of the page treated as footer
+        :param min_repeat_fraction: Share of pages a band line must repeat on
+        :param enable_ocr: OCR text-less pages (needs Tesseract)
+        :param ocr_engine: Engine to use (default: ``OCREngine()``)
+        """
+        self.strip_boilerplate = strip_boilerplate
+        self.header_band = header_band
+        self.footer_band = footer_band
+        self.min_repeat_fraction = min_repeat_fraction
+        self.enable_ocr = enable_ocr
+        self._ocr_engine = ocr_engine
+
+        # Per-PDF extraction stats, keyed by filename
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        # Deadline outcome of the last extract_from_multiple_pdfs call
+        self.skipped: List[str] = []
+        self.fast_path: List[str] = []
+        self.ocr_incomplete: List[str] = []
+
+    @property
+    def ocr_engine(self) -> Optional[OCREngine]:
+        """
+        OCR engine, created on first use; None if OCR is disabled or
+        Tesseract is not installed.
+        """
+        if self._ocr_engine is None and self.enable_ocr:
+            if OCREngine.available():
+                self._ocr_engine = OCREngine()
+            else:
+                print("[WARN] Tesseract not found, scanned pages will be skipped")
+                self.enable_ocr = False
+        return self._ocr_engine
+
+    def extract_text_from_pdf(
+        self,
+        pdf_path: str,
+        fast: bool = False,
+        deadline: Optional[Deadline] = None
+    ) -> str:
         """
         Extract text from a single PDF file.
+
+        ``fast`` uses plain PyMuPDF text only: no layout analysis, no
+        OCR and no pdfplumber fallback. OCR stops at ``deadline``;
+        pages it did not finish are counted in the stats
+        (``ocr_incomplete``).
         """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
         text_parts = []
+        page_texts: Dict[int, str] = {}
+        layout_pages: List[List[Tuple[bool, str]]] = []
+        layout = self.strip_boilerplate and not fast
+        raw_text = ""
 
         # -------- Method 1: PyMuPDF (fast) --------
         try:
-            doc = fitz.open(pdf_path)
-            for page in doc:
-                page_text = page.get_text()
-                if page_text:
-                    text_parts.append(page_text)
+            with fitz.open(pdf_path) as doc:
+                if layout:
+                    layout_pages = self._layout_blocks(doc)
+                else:
+                    for page in doc:
+                        page_texts[page.number] = page.get_text()
         except Exception:
             pass
 
-        # -------- Method 2: pdfplumber (fallback) --------
-        if len(" ".join(text_parts).strip()) < 300:
+        if layout:
+            page_chars = [
+                sum(len(text) for _, text in blocks) for blocks in layout_pages
+            ]
+        else:
+            page_chars = [len(page_texts[n].strip()) for n in sorted(page_texts)]
+
+        # -------- Method 2: OCR for pages without a text layer --------
+        ocr_texts: Dict[int, str] = {}
+        ocr_incomplete: List[int] = []
+        if not fast and self.ocr_engine is not None:
+            empty_pages = [
+                n for n, chars in enumerate(page_chars)
+                if chars < self.ocr_engine.min_page_chars
+            ]
+            try:
+                if empty_pages:
+                    ocr_texts, ocr_incomplete = self.ocr_engine.ocr_pages(
+                        pdf_path, page_numbers=empty_pages, deadline=deadline
+                    )
+            except Exception as e:
+                print(f"[OCR] {os.path.basename(pdf_path)}: {e}")
+
+        # OCR'd pages slot back in page order, before boilerplate removal
+        ocr_texts = {n: t for n, t in ocr_texts.items() if t.strip()}
+        if layout:
+            for number, ocr_text in ocr_texts.items():
+                layout_pages[number] = self._ocr_blocks(ocr_text)
+            layout_text, raw_text = self._extract_layout_text(layout_pages)
+            if layout_text:
+                text_parts.append(layout_text)
+        else:
+            page_texts.update(ocr_texts)
+            text_parts.extend(
+                page_texts[n] for n in sorted(page_texts) if page_texts[n]
+            )
+
+        # -------- Method 3: pdfplumber (fallback) --------
+        if not fast and len(" ".join(text_parts).strip()) < 300:
             try:
                 with pdfplumber.open(pdf_path) as pdf:
                     for page in pdf.pages:
@@ -41,13 +162,38 @@ class PDFExtractor:
             except Exception:
                 pass
 
-        return self._clean_text("\n".join(text_parts))
+        text = self._clean_text("\n".join(text_parts))
+        raw_text = self._clean_text(raw_text) if raw_text else text
+
+        self.stats[os.path.basename(pdf_path)] = {
+            "raw_chars": len(raw_text),
+            "kept_chars": len(text),
+            "chars_saved": max(len(raw_text) - len(text), 0),
+            "raw_words": len(raw_text.split()),
+            "kept_words": len(text.split()),
+            "ocr_pages": len(ocr_texts),
+            "ocr_incomplete": len(ocr_incomplete)
+        }
+
+        return text
 
     def extract_from_multiple_pdfs(
-        self, pdf_paths: List[str]
+        self,
+        pdf_paths: List[str],
+        reference_ids: Optional[List[str]] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, str]:
         """
         Extract text from multiple PDFs.
+
+        Results are keyed by ``reference_ids`` when given (e.g. original
+        upload names for content-addressed paths), else by filename.
+
+        With a ``deadline``, smaller PDFs go first so more references
+        make it in; past ``FAST_PATH_AFTER`` of the deadline the rest
+        use the fast path, and once it expires they are skipped
+        (listed in ``self.skipped`` / ``self.fast_path``). PDFs whose
+        OCR was cut short are listed in ``self.ocr_incomplete``.
         Returns:
         {
             "paper1.pdf": "extracted text...",
@@ -55,16 +201,158 @@ class PDFExtractor:
         }
         """
         extracted = {}
+        self.skipped = []
+        self.fast_path = []
+        self.ocr_incomplete = []
+
+        if reference_ids is None:
+            reference_ids = [os.path.basename(path) for path in pdf_paths]
+
+        jobs = list(zip(pdf_paths, reference_ids))
+        if deadline is not None:
+            jobs.sort(key=lambda job: self._file_size(job[0]))
+
+        for path, filename in jobs:
+            if deadline is not None and deadline.expired:
+                self.skipped.append(filename)
+                continue
+
+            fast = (
+                deadline is not None
+                and deadline.used_fraction() >= self.FAST_PATH_AFTER
+            )
+            if fast:
+                self.fast_path.append(filename)
 
-        for path in pdf_paths:
-            filename = os.path.basename(path)
             try:
-                extracted[filename] = self.extract_text_from_pdf(path)
+                extracted[filename] = self.extract_text_from_pdf(
+                    path, fast=fast, deadline=deadline
+                )
             except Exception as e:
                 print(f"[ERROR] {filename}: {e}")
                 extracted[filename] = ""
+                continue
+
+            stats = self.stats.pop(os.path.basename(path), None)
+            if stats is not None:
+                self.stats[filename] = stats
+                if stats["ocr_incomplete"]:
+                    self.ocr_incomplete.append(filename)
+
+        # Keep input order so chunk ids do not depend on priority
+        return {
+            filename: extracted[filename]
+            for filename in reference_ids if filename in extracted
+        }
 
-        return extracted
+    # -----------------------------
+    # LAYOUT-AWARE EXTRACTION
+    # -----------------------------
+    def _layout_blocks(self, doc) -> List[List[Tuple[bool, str]]]:
+        """
+        Text blocks per page in content-stream order (the order plain
+        ``get_text()`` uses, which keeps multi-column text together),
+        as (in_band, text) where ``in_band`` marks blocks in the
+        header/footer bands.
+        """
+        pages = []
+        for page in doc:
+            height = page.rect.height or 1.0
+            blocks = []
+            for block in page.get_text("blocks", sort=False):
+                x0, y0, x1, y1, text, _, block_type = block[:7]
+                if block_type != 0 or not text.strip():
+                    continue
+
+                in_band = (
+                    y1 <= height * self.header_band
+                    or y0 >= height * (1 - self.footer_band)
+                )
+                blocks.append((in_band, text.strip()))
+            pages.append(blocks)
+
+        return pages
+
+    @staticmethod
+    def _ocr_blocks(text: str) -> List[Tuple[bool, str]]:
+        """
+        Blocks for an OCR'd page: its paragraphs. OCR text carries no
+        positions, so the first and last of several paragraphs stand
+        in for the header/footer bands.
+        """
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+        if len(paragraphs) < 2:
+            return [(False, p) for p in paragraphs]
+
+        last = len(paragraphs) - 1
+        return [(idx in (0, last), p) for idx, p in enumerate(paragraphs)]
+
+    def _extract_layout_text(self, pages: List[List[Tuple[bool, str]]]) -> Tuple[str, str]:
+        """
+        Rebuild text from per-page blocks, dropping repeated
+        header/footer lines, page numbers and the reference list.
+
+        Returns (kept_text, raw_text).
+        """
+        raw_text = "\n".join(
+            text for blocks in pages for _, text in blocks
+        )
+
+        # Lines seen in the header/footer bands, counted once per page
+        band_counts = Counter()
+        for blocks in pages:
+            keys = {self._band_key(text) for in_band, text in blocks if in_band}
+            band_counts.update(keys)
+
+        min_pages = max(2, int(len(pages) * self.min_repeat_fraction))
+
+        kept = []
+        for blocks in pages:
+            for in_band, text in blocks:
+                if in_band and (
+                    band_counts[self._band_key(text)] >= min_pages
+                    or self.PAGE_NUMBER.match(text)
+                ):
+                    continue
+                kept.append(text)
+
+        kept = self._drop_reference_section(kept)
+
+        return "\n".join(kept), raw_text
+
+    def _drop_reference_section(self, blocks: List[str]) -> List[str]:
+        """
+        Cut everything from the last References/Bibliography heading,
+        provided it sits in the second half of the document (so a
+        table of contents entry does not truncate the body).
+        """
+        total = sum(len(b) for b in blocks)
+        seen = 0
+        cut_at = None
+
+        for idx, block in enumerate(blocks):
+            first_line = block.splitlines()[0] if block else ""
+            if seen >= total / 2 and self.REFERENCES_HEADING.match(first_line):
+                cut_at = idx
+            seen += len(block)
+
+        return blocks if cut_at is None else blocks[:cut_at]
+
+    @staticmethod
+    def _band_key(text: str) -> str:
+        """
+        Normalise a band line so running headers that only differ
+        by page number compare equal.
+        """
+        text = re.sub(r"\d+", "#", text.lower())
+        return " ".join(text.split())
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
 
     @staticmethod
     def _clean_text(text: str) -> str:
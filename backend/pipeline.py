@@ -1,10 +1,15 @@
-from typing import List, Dict
+import json
+import os
+from typing import Callable, List, Dict, Optional
 
 from backend.pdf_extractor import PDFExtractor
 from backend.text_chunker import TextChunker
 from backend.embedder import EmbeddingEngine
 from backend.matcher import CitationMatcher
 from backend.docx_handler import DocxHandler
+from backend.quality_controls import ParagraphGate
+from backend.manifest import CitationManifest
+from backend.deadline import CancellationToken, Deadline, DeadlineExceeded
 
 
 class CitationPipeline:
@@ -12,67 +17,315 @@ class CitationPipeline:
     Orchestrates the complete citation workflow.
     """
 
+    # Paragraphs encoded and searched per call
+    QUERY_BATCH_SIZE = 256
+
+    # Under a time budget: share of the remaining time PDF extraction
+    # may use, and the used share after which chunking skips spaCy
+    EXTRACTION_SHARE = 0.4
+    FAST_SEGMENTATION_AFTER = 0.5
+
     def __init__(
         self,
         similarity_threshold: float = 0.75,
-        top_k: int = 5
+        top_k: int = 5,
+        strip_boilerplate: bool = False,
+        incremental: bool = True,
+        max_references: int = 1,
+        aggregation: str = "max",
+        top_r: Optional[int] = None,
+        embedder: Optional[EmbeddingEngine] = None,
+        num_workers: int = 0
     ):
-        self.pdf_extractor = PDFExtractor()
+        """
+        :param strip_boilerplate: Use layout-aware PDF extraction, which
+                                  drops running headers/footers and the
+                                  reference list (opt-in)
+        :param max_references: Max references cited per paragraph
+        :param aggregation: Per-reference score ("max", "top_n_mean", "count")
+        :param top_r: Only search the chunks of the top-R references per
+                      paragraph (None → exhaustive search)
+        :param embedder: Engine to search with, e.g. one warm library
+                         engine shared by every request's pipeline
+        :param num_workers: Encoder processes for index builds when no
+                            ``embedder`` is given (0 → in-process)
+        """
+        self.pdf_extractor = PDFExtractor(strip_boilerplate=strip_boilerplate)
         self.chunker = TextChunker()
-        self.embedder = EmbeddingEngine()
+        # Only close an engine this pipeline created
+        self._owns_embedder = embedder is None
+        self.embedder = embedder or EmbeddingEngine(num_workers=num_workers)
         self.matcher = CitationMatcher(
-            similarity_threshold=similarity_threshold
+            similarity_threshold=similarity_threshold,
+            max_references=max_references,
+            aggregation=aggregation
         )
         self.docx_handler = DocxHandler()
+        self.paragraph_gate = ParagraphGate()
         self.top_k = top_k
+        self.top_r = top_r
+        self.incremental = incremental
+
+        # Version of the shared library loaded by build/load_library
+        self.library_version: Optional[str] = None
 
     def run(
         self,
         input_docx: str,
         reference_pdfs: List[str],
-        output_docx: str
+        output_docx: str,
+        reference_ids: Optional[List[str]] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        state_path: Optional[str] = None
     ):
         """
         Run the full pipeline.
+
+        ``reference_ids`` names each PDF in the citations (defaults to
+        the PDF filename).
+
+        With ``incremental`` enabled, a manifest of paragraph hashes and
+        decisions is written next to ``state_path`` (default:
+        ``output_docx``) along with the saved index; a later run on a
+        revised DOCX against the same corpus only searches changed or
+        new paragraphs.
+
+        With ``time_budget`` (seconds) or a ``cancel_token``, every stage
+        stops early when time runs out: PDFs and paragraphs are handled
+        in priority order, cheaper extraction and sentence splitting
+        are used when the budget gets tight, and the output DOCX is
+        always written with whatever decisions were completed. The
+        report's ``partial`` entry lists what was skipped.
+
+        Returns a run report with paragraph, skip and citation counts.
         """
+        deadline = Deadline(time_budget, cancel_token)
+        state_path = state_path or output_docx
+        index_dir = CitationManifest.index_dir_for(state_path)
 
-        # 1️⃣ Extract text from PDFs
-        print("[PIPELINE] Extracting PDF text...")
-        extracted_texts = self.pdf_extractor.extract_from_multiple_pdfs(
-            reference_pdfs
+        corpus_version = CitationManifest.corpus_version(
+            reference_pdfs, self._settings(), reference_ids
         )
 
-        # 2️⃣ Chunk PDF texts
-        print("[PIPELINE] Chunking reference texts...")
-        chunks = self.chunker.chunk_all_references(extracted_texts)
+        return self._cite_document(
+            input_docx,
+            output_docx,
+            corpus_version,
+            prepare_index=lambda reuse, partial: self._prepare_index(
+                reference_pdfs, reference_ids, index_dir, corpus_version,
+                reuse, deadline, partial
+            ),
+            deadline=deadline,
+            state_path=state_path
+        )
 
-        if not chunks:
-            raise RuntimeError("No valid text chunks created from PDFs")
+    def close(self):
+        """
+        Release worker pools (encoder, OCR) held by this pipeline.
+        """
+        if self._owns_embedder:
+            self.embedder.close()
+        if self.pdf_extractor._ocr_engine is not None:
+            self.pdf_extractor._ocr_engine.close()
 
-        # 3️⃣ Build embedding index
-        print("[PIPELINE] Building embedding index...")
-        self.embedder.build_index(chunks)
+    # -----------------------------
+    # SHARED LIBRARY
+    # -----------------------------
+    def build_library(
+        self,
+        reference_pdfs: List[str],
+        library_dir: str,
+        reference_ids: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Build one shared index over a whole reference library and
+        save it to ``library_dir``. Returns the extraction report.
+        """
+        self.library_version = CitationManifest.corpus_version(
+            reference_pdfs, self._settings(), reference_ids
+        )
+        extraction_report = self._build_index(reference_pdfs, reference_ids)
+
+        self.embedder.save_index(library_dir, version=self.library_version)
+        with open(os.path.join(library_dir, "library.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": self.library_version}, f)
+
+        return extraction_report
+
+    def load_library(self, library_dir: str) -> bool:
+        """
+        Load a library saved by ``build_library``.
+        """
+        version_path = os.path.join(library_dir, "library.json")
+        if not os.path.exists(version_path):
+            return False
 
-        # 4️⃣ Read DOCX paragraphs
+        with open(version_path, "r", encoding="utf-8") as f:
+            version = json.load(f)["version"]
+
+        if not self.embedder.load_index(library_dir, version=version):
+            return False
+
+        self.library_version = version
+        return True
+
+    def cite(
+        self,
+        input_docx: str,
+        output_docx: str,
+        allowed_references: Optional[List[str]] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        state_path: Optional[str] = None
+    ) -> Dict:
+        """
+        Cite a document against the loaded library, optionally only
+        from ``allowed_references``. Nothing is rebuilt: the subset is
+        applied as a FAISS id filter on the shared index.
+        ``time_budget`` / ``cancel_token`` / ``state_path`` work as in
+        ``run``.
+        """
+        if self.library_version is None:
+            raise RuntimeError("No reference library loaded")
+
+        corpus_version = CitationManifest.corpus_version(
+            [],
+            dict(
+                self._settings(),
+                library=self.library_version,
+                allowed_references=sorted(allowed_references or [])
+            )
+        )
+
+        return self._cite_document(
+            input_docx,
+            output_docx,
+            corpus_version,
+            prepare_index=lambda reuse, partial: {},
+            allowed_references=allowed_references,
+            deadline=Deadline(time_budget, cancel_token),
+            state_path=state_path
+        )
+
+    # -----------------------------
+    # HELPERS
+    # -----------------------------
+    def _cite_document(
+        self,
+        input_docx: str,
+        output_docx: str,
+        corpus_version: str,
+        prepare_index: Callable[[bool, Dict], Dict],
+        allowed_references: Optional[List[str]] = None,
+        deadline: Optional[Deadline] = None,
+        state_path: Optional[str] = None
+    ) -> Dict:
+        """
+        Gate, match and mark up one document. ``prepare_index(reuse,
+        partial)`` is only called when some paragraph actually needs
+        searching, and records any degraded extraction in ``partial``.
+        """
+        deadline = deadline or Deadline()
+        partial = {
+            "stopped": None,
+            "pdfs_skipped": [],
+            "fast_extraction": [],
+            "fast_segmentation": False,
+            "ocr_incomplete": [],
+            "paragraphs_unmatched": 0
+        }
+        manifest_path = CitationManifest.manifest_path_for(state_path or output_docx)
+
+        previous = (
+            CitationManifest.load(manifest_path) if self.incremental else None
+        )
+        if previous and previous.corpus_version != corpus_version:
+            print("[PIPELINE] Reference corpus changed, re-citing everything")
+            previous = None
+
+        # 1️⃣ Read DOCX paragraphs
         print("[PIPELINE] Reading DOCX paragraphs...")
-        paragraphs = self.docx_handler.read_paragraphs(input_docx)
+        records = self.docx_handler.read_paragraph_records(input_docx)
 
+        # Drop headings, captions, equations, ... before any encoding
+        candidates, skipped = self.paragraph_gate.split(records)
+        print(
+            f"[PIPELINE] {len(candidates)}/{len(records)} paragraphs "
+            f"need matching, skipped: {skipped or 'none'}"
+        )
+
+        # 2️⃣ Reuse decisions for unchanged paragraphs
+        manifest = CitationManifest(manifest_path, corpus_version)
         citation_decisions: Dict[int, Dict] = {}
+        pending = []
+
+        for record in candidates:
+            text_hash = CitationManifest.paragraph_hash(record["text"])
+
+            if previous and text_hash in previous.paragraphs:
+                decision = previous.paragraphs[text_hash]
+                manifest.paragraphs[text_hash] = decision
+                if decision:
+                    citation_decisions[record["index"]] = decision
+            else:
+                pending.append((record, text_hash))
+
+        # Longest paragraphs first: most likely to carry citable claims
+        pending.sort(key=lambda item: -len(item[0]["text"].split()))
+
+        reused = len(candidates) - len(pending)
+        if previous:
+            print(
+                f"[PIPELINE] Reusing {reused} decisions, "
+                f"{len(pending)} paragraphs changed"
+            )
 
-        # 5️⃣ Process each paragraph
+        # 3️⃣ Build (or load) the reference index only if needed
+        extraction_report = {}
+        snapshot = None
+        if pending:
+            try:
+                deadline.check("index")
+                extraction_report = prepare_index(previous is not None, partial)
+                # Pin one snapshot so a concurrent rebuild cannot mix indexes
+                snapshot = self.embedder.snapshot()
+            except DeadlineExceeded as e:
+                print(f"[PIPELINE] Stopped before matching ({e})")
+                partial["stopped"] = str(e)
+
+        # 4️⃣ Match changed / new paragraphs, one encode call per batch
         print("[PIPELINE] Matching citations...")
-        for idx, paragraph in enumerate(paragraphs):
-            similarity_results = self.embedder.search(
-                paragraph,
-                top_k=self.top_k
+        matched = 0
+
+        for start in range(0, len(pending) if snapshot else 0, self.QUERY_BATCH_SIZE):
+            if deadline.expired:
+                partial["stopped"] = f"matching: {deadline.reason}"
+                print(f"[PIPELINE] Stopped matching ({deadline.reason})")
+                break
+
+            batch = pending[start:start + self.QUERY_BATCH_SIZE]
+            scores, indices = self.embedder.search_batch(
+                [record["text"] for record, _ in batch],
+                top_k=self.top_k,
+                allowed_references=allowed_references,
+                top_r=self.top_r,
+                snapshot=snapshot
+            )
+            store = snapshot.chunk_metadata
+            decisions = self.matcher.decide_batch(
+                scores, indices, store.ref_codes, store.reference_ids
             )
 
-            decision = self.matcher.decide(similarity_results)
+            for (record, text_hash), decision in zip(batch, decisions):
+                self._record_decision(
+                    record, text_hash, decision, citation_decisions, manifest
+                )
+            matched += len(batch)
 
-            if decision["citation_required"]:
-                citation_decisions[idx] = decision
+        partial["paragraphs_unmatched"] = len(pending) - matched
 
-        # 6️⃣ Insert citation markers
+        # 5️⃣ Insert citation markers
         print("[PIPELINE] Writing output DOCX...")
         self.docx_handler.insert_citation_markers(
             input_docx=input_docx,
@@ -80,4 +333,182 @@ class CitationPipeline:
             citation_decisions=citation_decisions
         )
 
+        # Decisions against a partly indexed corpus must not be reused;
+        # unmatched paragraphs are simply absent and retried next run
+        degraded = self._is_degraded(partial)
+        if self.incremental and not degraded:
+            manifest.save()
+
         print("✅ Pipeline completed successfully")
+
+        return {
+            "paragraphs": len(records),
+            "searched": len(pending),
+            "reused": reused,
+            "skipped": skipped,
+            "citations": len(citation_decisions),
+            "extraction": extraction_report,
+            "partial": dict(
+                partial,
+                complete=not degraded and partial["paragraphs_unmatched"] == 0,
+                elapsed=round(deadline.elapsed(), 2)
+            )
+        }
+
+    @staticmethod
+    def _record_decision(
+        record: Dict,
+        text_hash: str,
+        decision: Dict,
+        citation_decisions: Dict[int, Dict],
+        manifest: CitationManifest
+    ):
+        if decision["citation_required"]:
+            citation_decisions[record["index"]] = decision
+            manifest.paragraphs[text_hash] = decision
+        else:
+            manifest.paragraphs[text_hash] = None
+
+    def _prepare_index(
+        self,
+        reference_pdfs: List[str],
+        reference_ids: Optional[List[str]],
+        index_dir: str,
+        corpus_version: str,
+        reuse: bool,
+        deadline: Optional[Deadline] = None,
+        partial: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Load the saved index for an unchanged corpus, otherwise
+        extract, chunk and embed the reference PDFs. The index is
+        saved with its ``corpus_version`` and only loaded if that
+        still matches, whatever the manifest says.
+
+        Either way the engine no longer holds a loaded library, so
+        ``library_version`` is cleared and ``cite`` refuses to run
+        until ``load_library`` is called again.
+        """
+        if reuse and self.embedder.load_index(index_dir, version=corpus_version):
+            self.library_version = None
+            print("[PIPELINE] Loaded saved embedding index")
+            return {}
+
+        partial = partial if partial is not None else {}
+        extraction_report = self._build_index(
+            reference_pdfs, reference_ids, deadline, partial
+        )
+        self.library_version = None
+
+        if self.incremental and not self._is_degraded(partial):
+            self.embedder.save_index(index_dir, version=corpus_version)
+
+        return extraction_report
+
+    def _build_index(
+        self,
+        reference_pdfs: List[str],
+        reference_ids: Optional[List[str]],
+        deadline: Optional[Deadline] = None,
+        partial: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Extract, chunk and embed the reference PDFs.
+
+        Under a ``deadline``, extraction gets ``EXTRACTION_SHARE`` of the
+        remaining time and degraded steps are recorded in ``partial``.
+        """
+        partial = partial if partial is not None else {}
+
+        print("[PIPELINE] Extracting PDF text...")
+        extracted_texts = self.pdf_extractor.extract_from_multiple_pdfs(
+            reference_pdfs,
+            reference_ids,
+            deadline=deadline.share(self.EXTRACTION_SHARE) if deadline else None
+        )
+        partial["pdfs_skipped"] = list(self.pdf_extractor.skipped)
+        partial["fast_extraction"] = list(self.pdf_extractor.fast_path)
+        partial["ocr_incomplete"] = list(self.pdf_extractor.ocr_incomplete)
+        extraction_report = self._report_extraction(extracted_texts)
+
+        if deadline is not None:
+            deadline.check("chunking")
+
+        fast = (
+            deadline is not None
+            and deadline.used_fraction() >= self.FAST_SEGMENTATION_AFTER
+        )
+        partial["fast_segmentation"] = fast
+
+        print("[PIPELINE] Chunking reference texts...")
+        chunks = self.chunker.chunk_all_references(extracted_texts, fast=fast)
+
+        if not chunks:
+            if partial["pdfs_skipped"]:
+                raise DeadlineExceeded("extraction: no PDF extracted in time")
+            raise RuntimeError("No valid text chunks created from PDFs")
+
+        print("[PIPELINE] Building embedding index...")
+        self.embedder.build_index(chunks, deadline=deadline)
+
+        return extraction_report
+
+    @staticmethod
+    def _is_degraded(partial: Dict) -> bool:
+        """
+        True if the index was built from skipped, cut-short or cheaper
+        extraction.
+        """
+        return bool(
+            partial.get("pdfs_skipped")
+            or partial.get("ocr_incomplete")
+            or partial.get("fast_extraction")
+            or partial.get("fast_segmentation")
+        )
+
+    def _settings(self) -> Dict:
+        """
+        Settings that change decisions; part of the corpus version.
+        """
+        return {
+            "model": self.embedder.model_name,
+            "threshold": self.matcher.similarity_threshold,
+            "top_k": self.top_k,
+            "top_r": self.top_r,
+            "max_references": self.matcher.max_references,
+            "aggregation": self.matcher.aggregation,
+            "strip_boilerplate": self.pdf_extractor.strip_boilerplate,
+            "window_overlap": self.embedder.window_overlap,
+            "max_chunk_words": self.chunker.max_chunk_words,
+            "overlap_words": self.chunker.overlap_words
+        }
+
+    def _report_extraction(self, extracted_texts: Dict[str, str]) -> Dict:
+        """
+        Print characters / chunks saved by boilerplate stripping per PDF.
+        """
+        report = {}
+
+        for filename in extracted_texts:
+            stats = self.pdf_extractor.stats.get(filename)
+            if not stats:
+                continue
+
+            chunks_saved = (
+                self.chunker.estimate_chunk_count(stats["raw_words"])
+                - self.chunker.estimate_chunk_count(stats["kept_words"])
+            )
+            report[filename] = {
+                "chars_saved": stats["chars_saved"],
+                "chunks_saved": max(chunks_saved, 0),
+                "ocr_pages": stats.get("ocr_pages", 0)
+            }
+
+            if self.pdf_extractor.strip_boilerplate:
+                print(
+                    f"[PIPELINE] {filename}: stripped "
+                    f"{stats['chars_saved']} chars "
+                    f"(~{report[filename]['chunks_saved']} chunks)"
+                )
+
+        return report
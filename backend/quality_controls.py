@@ -0,0 +1,107 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+class ParagraphGate:
+    """
+    Cheap rule-based filter that drops paragraphs which can never
+    need a citation (headings, captions, short list items, equations,
+    numeric-only lines, already-cited text) before any embedding work.
+    """
+
+    HEADING_STYLES = ("heading", "title", "subtitle", "toc")
+    # Keyword (any case), whitespace, then a whole number ("2", "2a")
+    # or upper-case Roman numeral, so "Charting ..." is body text
+    CAPTION_PATTERN = re.compile(
+        r"^(?i:figure|fig\.|table|chart|equation|eq\.)\s+(?:\d+[a-z]?|[IVX]+)\b"
+    )
+    CITATION_PATTERNS = [
+        # Markers written by DocxHandler.insert_citation_markers
+        re.compile(r"\[CITE:"),
+        # IEEE / numeric: [1], [2, 5], [3-7]
+        re.compile(r"\[\d+(?:\s*[,–-]\s*\d+)*\]"),
+        # APA / Harvard parenthetical: (Smith, 2020), (A & B, 2019a; C, 2021);
+        # the year must follow an author-like name, so "(enacted in 1995)"
+        # is not taken for a citation
+        re.compile(
+            r"\([^()]*?\b[A-Z][A-Za-z'\-]+"
+            r"(?:,| et al\.,?| (?:&|and) [A-Z][A-Za-z'\-]+,?)"
+            r"\s*(?:1[89]|20)\d{2}[a-z]?\b[^()]*\)"
+        ),
+        # Narrative: Smith (2020), Smith et al. (2020)
+        re.compile(r"[A-Z][A-Za-z'\-]+(?: et al\.)? \((?:1[89]|20)\d{2}[a-z]?\)"),
+    ]
+
+    def __init__(
+        self,
+        min_words: int = 8,
+        min_list_item_words: int = 12,
+        min_letter_ratio: float = 0.5
+    ):
+        """
+        :param min_words: Paragraphs shorter than this are skipped
+        :param min_list_item_words: Same, for list-styled paragraphs
+        :param min_letter_ratio: Below this share of letters → equation
+        """
+        self.min_words = min_words
+        self.min_list_item_words = min_list_item_words
+        self.min_letter_ratio = min_letter_ratio
+
+    def skip_reason(self, text: str, style: str = "") -> Optional[str]:
+        """
+        Return why a paragraph does not need a citation,
+        or None if it is a candidate.
+        """
+        style = (style or "").lower()
+        text = text.strip()
+        word_count = len(text.split())
+
+        if style.startswith(self.HEADING_STYLES):
+            return "heading"
+
+        if "caption" in style or self.CAPTION_PATTERN.match(text):
+            return "caption"
+
+        visible = [c for c in text if not c.isspace()]
+        letters = sum(c.isalpha() for c in visible)
+
+        if letters == 0:
+            return "numeric"
+
+        if visible and letters / len(visible) < self.min_letter_ratio:
+            return "equation"
+
+        if "list" in style and word_count < self.min_list_item_words:
+            return "list_item"
+
+        if word_count < self.min_words:
+            return "too_short"
+
+        if any(p.search(text) for p in self.CITATION_PATTERNS):
+            return "already_cited"
+
+        return None
+
+    def split(
+        self, records: List[Dict]
+    ) -> Tuple[List[Dict], Dict[str, int]]:
+        """
+        Split paragraph records into candidates and skip counts.
+
+        records format:
+        [
+            {"index": 0, "text": "...", "style": "Normal"}
+        ]
+        """
+        candidates = []
+        skipped = Counter()
+
+        for record in records:
+            reason = self.skip_reason(record["text"], record.get("style", ""))
+            if reason is None:
+                candidates.append(record)
+            else:
+                skipped[reason] += 1
+
+        return candidates, dict(skipped)
@@ -0,0 +1,240 @@
+import contextlib
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+import fitz  # PyMuPDF
+from docx import Document
+
+from backend.deadline import CancellationToken
+
+
+class JobRejected(RuntimeError):
+    """
+    Raised when a job cannot be admitted: too large for any budget,
+    or still queued when the queue timeout runs out.
+    """
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes (0 if unknown).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        # Peak, not current, but the best portable fallback (KiB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class ResourceGovernor:
+    """
+    Admission control for citation jobs in one shared process.
+
+    ``estimate`` projects a job's cost from cheap metadata (page
+    counts, DOCX paragraphs) before any extraction runs. ``admit``
+    rejects jobs over the per-job limits, queues jobs until memory
+    and CPU slots are free, and watches RSS while the job runs:
+    growth past ``job_rss_ceiling`` cancels the job's token, so the
+    pipeline stops and returns partial results.
+    """
+
+    # Rough projections for text PDFs and the default chunker/model.
+    # Memory figures are peak RSS growth of measured index builds
+    # (2k-32k chunks): a fixed ~265 MiB for tokenizer slices and encode
+    # activations, plus ~5.5 KiB per chunk besides its vectors
+    WORDS_PER_PAGE = 500
+    CHUNK_STEP_WORDS = 120            # max_chunk_words - overlap_words
+    EMBEDDING_DIM = 384
+    VECTOR_COPIES = 3                 # encoded, normalised, FAISS index
+    BYTES_PER_CHUNK = 6 << 10         # text, metadata, ids, lengths
+    BASE_JOB_BYTES = 320 << 20        # encode activations, DOCX, PyMuPDF
+    CPU_SECONDS_PER_PAGE = 0.02
+    CPU_SECONDS_PER_CHUNK = 0.01      # one CPU encode of a full chunk
+
+    def __init__(
+        self,
+        memory_budget: int = 2 << 30,
+        cpu_slots: Optional[int] = None,
+        max_job_pages: int = 3000,
+        max_job_cpu_seconds: float = 600.0,
+        job_rss_ceiling: Optional[int] = None,
+        queue_timeout: float = 120.0,
+        poll_interval: float = 0.25
+    ):
+        """
+        :param memory_budget: Projected bytes all running jobs may hold
+        :param cpu_slots: Jobs running at once (default: CPU cores // 2)
+        :param max_job_pages: Reject jobs with more PDF pages
+        :param max_job_cpu_seconds: Reject jobs projected to need more
+        :param job_rss_ceiling: RSS growth that cancels a running job
+                                (default: memory_budget)
+        :param queue_timeout: Seconds a job may wait for admission
+        :param poll_interval: Seconds between RSS checks
+        """
+        self.memory_budget = memory_budget
+        self.cpu_slots = cpu_slots or max((os.cpu_count() or 2) // 2, 1)
+        self.max_job_pages = max_job_pages
+        self.max_job_cpu_seconds = max_job_cpu_seconds
+        self.job_rss_ceiling = job_rss_ceiling or memory_budget
+        self.queue_timeout = queue_timeout
+        self.poll_interval = poll_interval
+
+        self._condition = threading.Condition()
+        self._running = 0
+        self._reserved = 0
+
+    # -----------------------------
+    # ESTIMATE
+    # -----------------------------
+    def estimate(self, pdf_paths: List[str], docx_path: Optional[str] = None) -> Dict:
+        """
+        Project pages, chunks, memory and CPU time for a job.
+        """
+        pages = 0
+        file_bytes = 0
+
+        for path in pdf_paths:
+            file_bytes += os.path.getsize(path)
+            try:
+                with fitz.open(path) as doc:
+                    pages += doc.page_count
+            except Exception:
+                # Unreadable PDFs are skipped by extraction anyway
+                continue
+
+        paragraphs = 0
+        if docx_path:
+            paragraphs = sum(
+                1 for p in Document(docx_path).paragraphs if p.text.strip()
+            )
+
+        chunks = -(-pages * self.WORDS_PER_PAGE // self.CHUNK_STEP_WORDS)
+        vectors = (chunks + paragraphs) * self.EMBEDDING_DIM * 4 * self.VECTOR_COPIES
+
+        return {
+            "pdfs": len(pdf_paths),
+            "pages": pages,
+            "paragraphs": paragraphs,
+            "chunks": chunks,
+            "file_bytes": file_bytes,
+            "memory_bytes": (
+                self.BASE_JOB_BYTES + file_bytes + vectors
+                + (chunks + paragraphs) * self.BYTES_PER_CHUNK
+            ),
+            "cpu_seconds": round(
+                pages * self.CPU_SECONDS_PER_PAGE
+                + (chunks + paragraphs) * self.CPU_SECONDS_PER_CHUNK, 1
+            )
+        }
+
+    # -----------------------------
+    # ADMIT
+    # -----------------------------
+    def check(self, estimate: Dict):
+        """
+        Raise ``JobRejected`` if a job could never be admitted.
+        """
+        if estimate["pages"] > self.max_job_pages:
+            raise JobRejected(
+                f"{estimate['pages']} pages exceeds the limit of {self.max_job_pages}"
+            )
+        if estimate["memory_bytes"] > self.memory_budget:
+            raise JobRejected(
+                f"projected memory {estimate['memory_bytes'] >> 20} MiB exceeds "
+                f"the budget of {self.memory_budget >> 20} MiB"
+            )
+        if estimate["cpu_seconds"] > self.max_job_cpu_seconds:
+            raise JobRejected(
+                f"projected {estimate['cpu_seconds']:.0f} CPU seconds exceeds "
+                f"the limit of {self.max_job_cpu_seconds:.0f}"
+            )
+
+    @contextlib.contextmanager
+    def admit(
+        self,
+        estimate: Dict,
+        on_queued: Optional[Callable[[Dict], None]] = None
+    ) -> Iterator[CancellationToken]:
+        """
+        Run a job under the budgets. Blocks while the job is queued
+        and yields a token to pass to ``CitationPipeline.run``; the
+        token is cancelled if the job's RSS growth passes the ceiling.
+        """
+        self.check(estimate)
+        memory = estimate["memory_bytes"]
+
+        with self._condition:
+            if not self._fits(memory) and on_queued:
+                on_queued(self.status())
+
+            if not self._condition.wait_for(
+                lambda: self._fits(memory), timeout=self.queue_timeout
+            ):
+                raise JobRejected("server busy, try again later")
+
+            self._running += 1
+            self._reserved += memory
+
+        token = CancellationToken()
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=self._watch, args=(token, stop, memory), daemon=True
+        )
+        watcher.start()
+
+        try:
+            yield token
+        finally:
+            stop.set()
+            watcher.join()
+            with self._condition:
+                self._running -= 1
+                self._reserved -= memory
+                self._condition.notify_all()
+
+    def status(self) -> Dict:
+        return {
+            "running": self._running,
+            "cpu_slots": self.cpu_slots,
+            "reserved_bytes": self._reserved,
+            "memory_budget": self.memory_budget,
+            "rss_bytes": current_rss()
+        }
+
+    # -----------------------------
+    # HELPERS
+    # -----------------------------
+    def _fits(self, memory: int) -> bool:
+        return (
+            self._running < self.cpu_slots
+            and self._reserved + memory <= self.memory_budget
+        )
+
+    def _watch(self, token: CancellationToken, stop: threading.Event, memory: int):
+        """
+        Cancel ``token`` if the job's RSS growth passes the ceiling.
+
+        RSS is per process, so growth is measured from the job's start
+        and the memory reserved by the other running jobs is deducted:
+        a job is only charged for growth they do not account for. A
+        neighbour that overruns its own reservation is still charged
+        to every job running next to it.
+        """
+        baseline = current_rss()
+
+        while not stop.wait(self.poll_interval):
+            with self._condition:
+                others = self._reserved - memory
+            if current_rss() - baseline - others > self.job_rss_ceiling:
+                token.cancel(
+                    f"memory ceiling of {self.job_rss_ceiling >> 20} MiB exceeded"
+                )
+                return
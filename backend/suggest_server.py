@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from backend.citation_engine import CitationEngine
+from backend.pipeline import CitationPipeline
+
+
+class MicroBatcher:
+    """
+    Collects paragraphs from concurrent requests for up to
+    ``max_wait_ms`` and encodes/searches them in one call.
+    """
+
+    def __init__(
+        self,
+        pipeline: CitationPipeline,
+        max_wait_ms: float = 3.0,
+        max_batch: int = 64
+    ):
+        self.pipeline = pipeline
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Dict]" = queue.Queue()
+
+        worker = threading.Thread(target=self._loop, daemon=True)
+        worker.start()
+
+    def submit(self, texts: List[str]) -> List[Dict]:
+        """
+        Block until decisions for ``texts`` are ready.
+        """
+        item = {"texts": texts, "done": threading.Event()}
+        self._queue.put(item)
+        item["done"].wait()
+
+        if "error" in item:
+            raise item["error"]
+        return item["decisions"]
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0]["texts"])
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item["texts"])
+
+            self._run(batch)
+
+    def _run(self, batch: List[Dict]):
+        texts = [text for item in batch for text in item["texts"]]
+
+        try:
+            pipeline = self.pipeline
+            snapshot = pipeline.embedder.snapshot()
+            scores, indices = pipeline.embedder.search_batch(
+                texts, top_k=pipeline.top_k, top_r=pipeline.top_r,
+                snapshot=snapshot
+            )
+            store = snapshot.chunk_metadata
+            decisions = pipeline.matcher.decide_batch(
+                scores, indices, store.ref_codes, store.reference_ids
+            )
+
+            offset = 0
+            for item in batch:
+                item["decisions"] = decisions[offset:offset + len(item["texts"])]
+                offset += len(item["texts"])
+        except Exception as e:
+            for item in batch:
+                item["error"] = e
+        finally:
+            for item in batch:
+                item["done"].set()
+
+
+class SuggestionService:
+    """
+    Long-lived citation suggestions against a warm library index.
+    """
+
+    def __init__(
+        self,
+        pipeline: CitationPipeline,
+        reference_metadata: Optional[Dict[str, Dict]] = None,
+        max_wait_ms: float = 3.0
+    ):
+        self.pipeline = pipeline
+        self.reference_metadata = reference_metadata or {}
+        self.batcher = MicroBatcher(pipeline, max_wait_ms=max_wait_ms)
+        self._citation_engines = {
+            style: CitationEngine(style=style) for style in ("APA", "IEEE", "MLA")
+        }
+
+    def warm_up(self):
+        """
+        Load the model and run one search so the first request is fast.
+        """
+        self.batcher.submit(["warm up"])
+
+    def suggest(self, paragraphs: List[str], style: str = "APA") -> List[Dict]:
+        decisions = self.batcher.submit(paragraphs)
+        citation_engine = self._citation_engines.get(
+            style.upper(), CitationEngine(style=style)
+        )
+
+        suggestions = []
+        for decision in decisions:
+            suggestion = dict(decision)
+            if decision["citation_required"]:
+                ref_ids = decision.get("reference_ids") or [decision["reference_id"]]
+                suggestion["citation"] = citation_engine.format_group(
+                    ref_ids, {ref_id: self._metadata(ref_id) for ref_id in ref_ids}
+                )
+            suggestions.append(suggestion)
+
+        return suggestions
+
+    def _metadata(self, ref_id: str) -> Dict:
+        if ref_id in self.reference_metadata:
+            return self.reference_metadata[ref_id]
+
+        # IEEE numbers follow library order when none are given
+        reference_ids = self.pipeline.embedder.chunk_metadata.reference_ids
+        return {
+            "authors": [],
+            "year": "n.d.",
+            "index": reference_ids.index(ref_id) + 1
+        }
+
+
+class SuggestionHandler(BaseHTTPRequestHandler):
+    """
+    POST /suggest  {"paragraphs": ["..."], "style": "APA"}
+                   (or {"paragraph": "..."})
+    GET  /health
+    """
+
+    service: SuggestionService = None
+
+    # Request limits: paragraphs per request, request body size
+    MAX_PARAGRAPHS = 256
+    MAX_BODY_BYTES = 1 << 20
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send(404, {"error": "Not found"})
+
+        store = self.service.pipeline.embedder.chunk_metadata
+        self._send(200, {
+            "status": "ok",
+            "references": len(store.reference_ids),
+            "chunks": len(store)
+        })
+
+    def do_POST(self):
+        if self.path != "/suggest":
+            return self._send(404, {"error": "Not found"})
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            return self._send(400, {"error": "Invalid Content-Length"})
+        if length > self.MAX_BODY_BYTES:
+            return self._send(413, {"error": f"Body over {self.MAX_BODY_BYTES} bytes"})
+
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "Invalid JSON"})
+
+        if not isinstance(payload, dict):
+            return self._send(400, {"error": "Expected a JSON object"})
+
+        paragraphs = payload.get("paragraphs")
+        if paragraphs is None and "paragraph" in payload:
+            paragraphs = [payload["paragraph"]]
+
+        if (
+            not isinstance(paragraphs, list)
+            or not paragraphs
+            or not all(isinstance(p, str) for p in paragraphs)
+        ):
+            return self._send(400, {"error": "Expected 'paragraph' or 'paragraphs'"})
+
+        if len(paragraphs) > self.MAX_PARAGRAPHS:
+            return self._send(413, {
+                "error": f"At most {self.MAX_PARAGRAPHS} paragraphs per request"
+            })
+
+        style = payload.get("style", "APA")
+        if not isinstance(style, str):
+            return self._send(400, {"error": "Expected 'style' to be a string"})
+
+        start = time.perf_counter()
+        try:
+            suggestions = self.service.suggest(
+                paragraphs, style=style
+            )
+        except Exception as e:
+            return self._send(500, {"error": str(e)})
+
+        self._send(200, {
+            "suggestions": suggestions,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
+
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Per-request logging costs latency (and fails on Unix sockets)
+        pass
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+    service: SuggestionService,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Optional[str] = None
+):
+    handler = type("BoundHandler", (SuggestionHandler,), {"service": service})
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+        print(f"[SUGGEST] Listening on unix:{socket_path}")
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        print(f"[SUGGEST] Listening on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Citation suggestion service")
+    parser.add_argument("--library", required=True,
+                        help="Library directory (built with --pdfs if missing)")
+    parser.add_argument("--pdfs", nargs="*", default=[],
+                        help="Reference PDFs to build the library from")
+    parser.add_argument("--metadata", help="JSON file: reference id → metadata")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="Serve on a Unix socket instead")
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--top-r", type=int, default=None)
+    parser.add_argument("--max-references", type=int, default=1)
+    parser.add_argument("--max-wait-ms", type=float, default=3.0)
+    args = parser.parse_args()
+
+    pipeline = CitationPipeline(
+        similarity_threshold=args.threshold,
+        top_k=args.top_k,
+        max_references=args.max_references,
+        top_r=args.top_r
+    )
+
+    if not pipeline.load_library(args.library):
+        if not args.pdfs:
+            parser.error(f"No library in {args.library}; pass --pdfs to build one")
+        pipeline.build_library(args.pdfs, args.library)
+
+    reference_metadata = {}
+    if args.metadata:
+        with open(args.metadata, "r", encoding="utf-8") as f:
+            reference_metadata = json.load(f)
+
+    service = SuggestionService(
+        pipeline, reference_metadata, max_wait_ms=args.max_wait_ms
+    )
+    service.warm_up()
+
+    serve(service, args.host, args.port, args.socket)
+
+
+if __name__ == "__main__":
+    main()
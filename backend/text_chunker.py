@@ -17,6 +17,9 @@ class TextChunker:
     while preserving reference identity.
     """
 
+    # Cheap sentence boundary used when spaCy is too slow for the budget
+    SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+
     def __init__(self, max_chunk_words: int = 150, overlap_words: int = 30):
         """
         :param max_chunk_words: Maximum words per chunk
@@ -26,11 +29,13 @@ class TextChunker:
         self.overlap_words = overlap_words
 
     def chunk_all_references(
-        self, extracted_texts: Dict[str, str]
+        self, extracted_texts: Dict[str, str], fast: bool = False
     ) -> List[Dict]:
         """
         Chunk text from multiple PDFs.
 
+        ``fast`` splits sentences with a regex instead of spaCy.
+
         Input:
         {
             "paper1.pdf": "full extracted text...",
@@ -53,7 +58,7 @@ class TextChunker:
             if not text.strip():
                 continue
 
-            chunks = self._chunk_single_text(text)
+            chunks = self._chunk_single_text(text, fast=fast)
 
             for idx, chunk in enumerate(chunks):
                 all_chunks.append({
@@ -64,14 +69,17 @@ class TextChunker:
 
         return all_chunks
 
-    def _chunk_single_text(self, text: str) -> List[str]:
+    def _chunk_single_text(self, text: str, fast: bool = False) -> List[str]:
         """
         Chunk a single document text into semantic chunks.
         """
         text = self._clean_text(text)
 
-        doc = nlp(text)
-        sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+        if fast:
+            sentences = [s.strip() for s in self.SENTENCE_END.split(text) if s.strip()]
+        else:
+            doc = nlp(text)
+            sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
 
         chunks = []
         current_chunk = []
@@ -102,6 +110,18 @@ class TextChunker:
 
         return chunks
 
+    def estimate_chunk_count(self, word_count: int) -> int:
+        """
+        Approximate number of chunks produced for a text of
+        ``word_count`` words (ignores sentence boundaries).
+        """
+        if word_count <= 0:
+            return 0
+
+        step = max(self.max_chunk_words - self.overlap_words, 1)
+        extra = max(word_count - self.max_chunk_words, 0)
+        return 1 + -(-extra // step)
+
     def _get_overlap_words(self, chunk_sentences: List[str]) -> List[str]:
         """
         Returns last N words as overlap sentences.
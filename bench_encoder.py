@@ -0,0 +1,63 @@
+import random
+import sys
+import time
+
+from sentence_transformers import SentenceTransformer
+
+from backend.encoder_pool import ParallelEncoder
+from backend.pdf_extractor import PDFExtractor
+from backend.text_chunker import TextChunker
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+WORDS = (
+    "neural network learning model data training feature layer "
+    "gradient loss optimisation accuracy representation attention"
+).split()
+
+
+def synthetic_chunks(count: int):
+    # Mixed lengths, like real chunker output plus short tail chunks
+    rng = random.Random(0)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.choice([8, 30, 80, 150])))
+        for _ in range(count)
+    ]
+
+
+def pdf_chunks(pdf_paths):
+    extracted = PDFExtractor().extract_from_multiple_pdfs(pdf_paths)
+    return [c["text"] for c in TextChunker().chunk_all_references(extracted)]
+
+
+def timed(label: str, fn, count: int):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {count / elapsed:8.1f} chunks/sec ({elapsed:.2f}s)")
+
+
+def main():
+    texts = pdf_chunks(sys.argv[1:]) if len(sys.argv) > 1 else synthetic_chunks(4000)
+    model = SentenceTransformer(MODEL_NAME, device="cpu")
+
+    print(f"\n=== ENCODER BENCHMARK ({len(texts)} chunks) ===\n")
+
+    # Current call: single process, default batch size, arrival order
+    timed("model.encode (baseline)", lambda: model.encode(texts), len(texts))
+
+    bucketed = ParallelEncoder(MODEL_NAME, num_workers=0)
+    timed("bucketed, in-process", lambda: bucketed.encode(texts, model), len(texts))
+
+    for workers in (2, 4, 8):
+        encoder = ParallelEncoder(MODEL_NAME, num_workers=workers)
+        encoder.encode(texts[:workers], model)  # warm up the pool
+        timed(
+            f"bucketed, {workers} workers",
+            lambda: encoder.encode(texts, model),
+            len(texts)
+        )
+        encoder.close()
+
+
+if __name__ == "__main__":
+    main()
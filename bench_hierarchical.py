@@ -0,0 +1,78 @@
+import sys
+import time
+
+from backend.docx_handler import DocxHandler
+from backend.embedder import EmbeddingEngine
+from backend.matcher import CitationMatcher
+from backend.pdf_extractor import PDFExtractor
+from backend.quality_controls import ParagraphGate
+from backend.text_chunker import TextChunker
+
+TOP_K = 5
+TOP_R_VALUES = (1, 2, 4, 8, 16, 32)
+REPEATS = 5
+
+
+def decision_key(decision):
+    return tuple(decision.get("reference_ids") or [decision["reference_id"]]) \
+        if decision["citation_required"] else None
+
+
+def timed_search(engine, queries, top_r):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = engine.search_embeddings(queries, top_k=TOP_K, top_r=top_r)
+    return (time.perf_counter() - start) / REPEATS, result
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python bench_hierarchical.py manuscript.docx ref1.pdf [ref2.pdf ...]")
+        return
+
+    docx_path, pdf_paths = sys.argv[1], sys.argv[2:]
+
+    extracted = PDFExtractor(strip_boilerplate=True).extract_from_multiple_pdfs(pdf_paths)
+    chunks = TextChunker().chunk_all_references(extracted)
+
+    engine = EmbeddingEngine()
+    engine.build_index(chunks)
+    store = engine.chunk_metadata
+
+    records = DocxHandler().read_paragraph_records(docx_path)
+    candidates, _ = ParagraphGate().split(records)
+    queries = engine.encode_queries([r["text"] for r in candidates])
+
+    matcher = CitationMatcher(similarity_threshold=0.75)
+
+    def decide(scores, indices):
+        return [
+            decision_key(d) for d in
+            matcher.decide_batch(scores, indices, store.ref_codes, store.reference_ids)
+        ]
+
+    print(
+        f"\n=== HIERARCHICAL SEARCH ({len(store.reference_ids)} references, "
+        f"{len(store)} chunks, {len(candidates)} paragraphs) ===\n"
+    )
+
+    base_time, (scores, indices) = timed_search(engine, queries, None)
+    baseline = decide(scores, indices)
+    print(f"{'exhaustive':<12} {base_time * 1000:8.2f} ms")
+
+    for top_r in TOP_R_VALUES:
+        if top_r >= len(store.reference_ids):
+            break
+
+        elapsed, (scores, indices) = timed_search(engine, queries, top_r)
+        decisions = decide(scores, indices)
+        agreement = sum(a == b for a, b in zip(baseline, decisions)) / max(len(baseline), 1)
+
+        print(
+            f"top_r={top_r:<6} {elapsed * 1000:8.2f} ms  "
+            f"speedup {base_time / elapsed:5.2f}x  agreement {agreement:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import sys
+import tempfile
+import time
+
+from backend.ocr_engine import OCREngine
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python bench_ocr.py scanned.pdf [dpi]")
+        return
+
+    pdf_path = sys.argv[1]
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    if not OCREngine.available():
+        print("Tesseract not found")
+        return
+
+    print(f"\n=== OCR BENCHMARK ({pdf_path}, {dpi} dpi) ===\n")
+
+    for workers in WORKER_COUNTS:
+        # Fresh cache per run so every page is really OCR'd
+        engine = OCREngine(dpi=dpi, num_workers=workers, cache_dir=tempfile.mkdtemp())
+        pages, _ = engine.ocr_pages(pdf_path)
+        print(f"{workers} workers: {len(pages)} pages, {engine.pages_per_second():.2f} pages/sec")
+
+        # Second pass is served from the page cache
+        start = time.perf_counter()
+        engine.ocr_pages(pdf_path)
+        print(f"  cached pass: {time.perf_counter() - start:.3f}s")
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
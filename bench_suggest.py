@@ -0,0 +1,46 @@
+import json
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+URL = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8765/suggest"
+REQUESTS = 500
+CONCURRENCY = 8
+PARAGRAPH = (
+    "Convolutional neural networks learn hierarchical image features "
+    "and have become the standard approach for visual recognition."
+)
+
+
+def request_once(_):
+    body = json.dumps({"paragraph": PARAGRAPH, "style": "APA"}).encode("utf-8")
+    req = urllib.request.Request(
+        URL, data=body, headers={"Content-Type": "application/json"}
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(req) as resp:
+        resp.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def main():
+    print(f"\n=== SUGGEST LATENCY ({URL}) ===\n")
+
+    for workers in (1, CONCURRENCY):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(request_once, range(REQUESTS)))
+
+        print(
+            f"{workers} client(s): p50 {percentile(latencies, 0.5):6.2f} ms  "
+            f"p99 {percentile(latencies, 0.99):6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
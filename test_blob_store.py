@@ -0,0 +1,45 @@
+import io
+import os
+import tempfile
+
+from backend.blob_store import BlobStore
+
+def main():
+    root = tempfile.mkdtemp()
+    store = BlobStore(root, max_bytes=10)
+
+    first = store.put(io.BytesIO(b"same pdf bytes"), suffix=".pdf")
+    second = store.put(io.BytesIO(b"same pdf bytes"), suffix=".pdf")
+
+    print("\n=== BLOB STORE ===\n")
+    print("Digest       :", first["digest"])
+    print("Deduplicated :", first["path"] == second["path"])
+
+    other = store.put(io.BytesIO(b"another upload"), suffix=".pdf")
+    with store.pinned([other["digest"]]):
+        freed = store.gc()
+
+    print("Bytes freed  :", freed)
+
+    # Pinned on put: survives gc until unpinned
+    pinned = store.put(io.BytesIO(b"pinned upload"), suffix=".pdf", pin=True)
+    store.gc()
+    print("Pinned kept  :", os.path.exists(pinned["path"]))
+    store.unpin([pinned["digest"]])
+
+    # Work directories count against the same budget
+    key = BlobStore.work_key("paper.docx", [first["digest"]])
+    work_dir = store.work_dir(key)
+    with open(os.path.join(work_dir, "state.manifest.json"), "w") as f:
+        f.write("{}")
+
+    with store.pinned([key]):
+        store.gc()
+        print("Work dir kept:", os.path.exists(work_dir))
+
+    store.max_bytes = 0
+    store.gc()
+    print("Work dir gc  :", not os.path.exists(work_dir))
+
+if __name__ == "__main__":
+    main()
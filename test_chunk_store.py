@@ -0,0 +1,37 @@
+import tempfile
+
+from backend.chunk_store import ChunkStore
+
+def main():
+    chunks = [
+        {
+            "reference_id": "paper1.pdf",
+            "chunk_id": "paper1.pdf_chunk_0",
+            "text": "Neural networks are widely used in deep learning."
+        },
+        {
+            "reference_id": "paper2.pdf",
+            "chunk_id": "paper2.pdf_chunk_0",
+            "text": "Climate change is caused by greenhouse gas emissions."
+        },
+        {
+            "reference_id": "paper1.pdf",
+            "chunk_id": "paper1.pdf_chunk_1",
+            "text": "Machine learning enables systems to learn from data."
+        }
+    ]
+
+    store, order = ChunkStore.from_chunks(chunks)
+
+    directory = tempfile.mkdtemp()
+    store.save(directory)
+    mapped = ChunkStore.load(directory, mmap=True)
+
+    print("\n=== CHUNK STORE ===\n")
+    print("Row order         :", list(order))
+    print("Reference offsets :", list(mapped.reference_offsets))
+    for row in range(len(mapped)):
+        print(mapped.chunk_id(row), "->", mapped.text(row))
+
+if __name__ == "__main__":
+    main()
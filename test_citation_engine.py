@@ -9,6 +9,13 @@ def main():
             "title": "Deep Learning Methods",
             "source": "Journal of AI",
             "index": 1
+        },
+        "paper2.pdf": {
+            "authors": ["Johnson, R."],
+            "year": 2019,
+            "title": "Machine Learning Basics",
+            "source": "Springer",
+            "index": 2
         }
     }
 
@@ -18,6 +25,10 @@ def main():
     print("In-text citation:")
     print(citation_engine.format_in_text("paper1.pdf", metadata["paper1.pdf"]))
 
+    print("\nGrouped citation:")
+    print(citation_engine.format_group(["paper1.pdf", "paper2.pdf"], metadata))
+    print(CitationEngine(style="IEEE").format_group(["paper1.pdf", "paper2.pdf"], metadata))
+
     print("\nBibliography entry:")
     print(bib_builder.build_entry("paper1.pdf", metadata["paper1.pdf"]))
 
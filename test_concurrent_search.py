@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.embedder import EmbeddingEngine
+from backend.matcher import CitationMatcher
+
+LIBRARY_A = [
+    {"reference_id": "paper1.pdf", "chunk_id": "paper1.pdf_chunk_0",
+     "text": "Neural networks are widely used in deep learning."},
+    {"reference_id": "paper2.pdf", "chunk_id": "paper2.pdf_chunk_0",
+     "text": "Climate change is caused by greenhouse gas emissions."}
+]
+
+LIBRARY_B = LIBRARY_A + [
+    {"reference_id": "paper3.pdf", "chunk_id": "paper3.pdf_chunk_0",
+     "text": "Soil erosion reduces agricultural productivity."}
+]
+
+QUERIES = [
+    "Deep learning relies on neural networks.",
+    "Greenhouse gases drive global warming.",
+    "Farmland loses topsoil to erosion."
+]
+
+
+def main():
+    engine = EmbeddingEngine()
+    engine.build_index(LIBRARY_A)
+    matcher = CitationMatcher(similarity_threshold=0.3)
+
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        searches = 0
+        while not done.is_set() or searches == 0:
+            try:
+                snapshot = engine.snapshot()
+                scores, indices = engine.search_batch(QUERIES, top_k=3, snapshot=snapshot)
+                store = snapshot.chunk_metadata
+                assert indices.max() < len(store)
+                matcher.decide_batch(scores, indices, store.ref_codes, store.reference_ids)
+            except Exception as e:
+                errors.append(e)
+            searches += 1
+        return searches
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(reader) for _ in range(4)]
+        engine.rebuild_in_background(LIBRARY_B).join()
+        done.set()
+        searches = sum(f.result() for f in futures)
+
+    print("\n=== CONCURRENT SEARCH ===\n")
+    print(f"Searches during rebuild: {searches}")
+    print(f"Errors: {errors}")
+    print(f"References after swap: {engine.chunk_metadata.reference_ids}")
+
+    assert not errors
+    assert len(engine.chunk_metadata.reference_ids) == 3
+
+
+if __name__ == "__main__":
+    main()
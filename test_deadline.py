@@ -0,0 +1,33 @@
+import time
+
+from backend.deadline import CancellationToken, Deadline, DeadlineExceeded
+
+def main():
+    unlimited = Deadline()
+    budget = Deadline(0.05)
+    share = budget.share(0.5)
+
+    print("\n=== DEADLINE ===\n")
+    print(f"Unlimited expired: {unlimited.expired}")
+    print(f"Budget remaining: {budget.remaining():.3f}s, share: {share.budget:.3f}s")
+
+    time.sleep(0.06)
+    print(f"Budget expired: {budget.expired} ({budget.reason})")
+
+    try:
+        budget.check("matching")
+    except DeadlineExceeded as e:
+        print(f"Check raised: {e}")
+
+    token = CancellationToken()
+    cancellable = Deadline(token=token)
+    token.cancel("user cancelled")
+    print(f"Cancelled: {cancellable.expired} ({cancellable.reason})")
+
+    assert not unlimited.expired
+    assert share.budget <= 0.025
+    assert budget.expired and share.expired
+    assert cancellable.reason == "user cancelled"
+
+if __name__ == "__main__":
+    main()
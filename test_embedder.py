@@ -32,5 +32,15 @@ def main():
         print("Text      :", r["text"])
         print("-" * 50)
 
+    # Paragraph far beyond the encoder's max length: its tail must still match
+    long_query = " ".join(["Unrelated filler sentence about the weather."] * 60)
+    long_query += " Greenhouse gas emissions cause climate change."
+    windows, owners = engine.query_windows([query, long_query])
+    results = engine.search(long_query)
+
+    print("\n=== LONG PARAGRAPH ===\n")
+    print("Windows   :", len(windows), owners.tolist())
+    print("Best match:", results[0]["reference_id"])
+
 if __name__ == "__main__":
     main()
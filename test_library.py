@@ -0,0 +1,21 @@
+from backend.pipeline import CitationPipeline
+
+def main():
+    pipeline = CitationPipeline(similarity_threshold=0.75)
+
+    # Build the shared library once
+    pipeline.build_library(
+        reference_pdfs=["sample_reference.pdf", "another_reference.pdf"],
+        library_dir="library_index"
+    )
+
+    # Each manuscript cites only from its own subset, no rebuild
+    report = pipeline.cite(
+        input_docx="sample.docx",
+        output_docx="final_with_markers.docx",
+        allowed_references=["sample_reference.pdf"]
+    )
+    print("Subset run :", report)
+
+if __name__ == "__main__":
+    main()
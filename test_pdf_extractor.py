@@ -9,6 +9,16 @@ def main():
     print("\n=== EXTRACTED TEXT (first 1000 chars) ===\n")
     print(text[:1000])
 
+    # Layout-aware mode: drops headers/footers and the reference list
+    layout_extractor = PDFExtractor(strip_boilerplate=True)
+    stripped = layout_extractor.extract_text_from_pdf(pdf_path)
+    stats = layout_extractor.stats["sample_reference.pdf"]
+
+    print("\n=== BOILERPLATE STRIPPING ===\n")
+    print("Raw chars   :", stats["raw_chars"])
+    print("Kept chars  :", len(stripped))
+    print("Chars saved :", stats["chars_saved"])
+
     print("\n✅ PDF extraction successful")
 
 if __name__ == "__main__":
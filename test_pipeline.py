@@ -10,11 +10,20 @@ def main():
 
     output_docx = "final_with_markers.docx"
 
-    pipeline.run(
+    report = pipeline.run(
         input_docx=input_docx,
         reference_pdfs=reference_pdfs,
         output_docx=output_docx
     )
+    print("First run :", report)
+
+    # Second run on the same DOCX reuses every decision from the manifest
+    report = pipeline.run(
+        input_docx=input_docx,
+        reference_pdfs=reference_pdfs,
+        output_docx=output_docx
+    )
+    print("Re-run    :", report)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,60 @@
+from backend.quality_controls import ParagraphGate
+
+def main():
+    gate = ParagraphGate()
+
+    records = [
+        {"index": 0, "text": "Introduction", "style": "Heading 1"},
+        {"index": 1, "text": "Figure 2: Accuracy per epoch", "style": "Normal"},
+        {"index": 2, "text": "E = mc^2 + 0.5 * x", "style": "Normal"},
+        {"index": 3, "text": "2021 2022 2023", "style": "Normal"},
+        {"index": 4, "text": "Use a GPU", "style": "List Bullet"},
+        {
+            "index": 5,
+            "text": "Neural networks were shown to outperform kernel "
+                    "methods on image tasks (Smith et al., 2021).",
+            "style": "Normal"
+        },
+        {
+            "index": 6,
+            "text": "Deep neural networks learn hierarchical feature "
+                    "representations directly from raw input data.",
+            "style": "Normal"
+        },
+        {
+            "index": 7,
+            "text": "The policy shift (which began in 2020) cut regional "
+                    "emissions by a third within two years.",
+            "style": "Normal"
+        },
+        {
+            "index": 8,
+            "text": "Charting the rise of emissions across decades shows "
+                    "how quickly industrial output grew.",
+            "style": "Normal"
+        },
+        {
+            "index": 9,
+            "text": "Table vibrations were measured with an accelerometer "
+                    "mounted under the work surface.",
+            "style": "Normal"
+        },
+        {"index": 10, "text": "Table IV: Results per dataset", "style": "Normal"}
+    ]
+
+    candidates, skipped = gate.split(records)
+
+    print("\n=== PARAGRAPH GATE ===\n")
+    for record in records:
+        reason = gate.skip_reason(record["text"], record["style"])
+        print(f"{record['index']}: {reason or 'candidate'}")
+
+    print("\nCandidates :", [r["index"] for r in candidates])
+    print("Skipped    :", skipped)
+
+    # A year in parentheses is not a citation without an author, and
+    # a caption keyword needs a number after it
+    assert [r["index"] for r in candidates] == [6, 7, 8, 9]
+
+if __name__ == "__main__":
+    main()
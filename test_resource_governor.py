@@ -0,0 +1,91 @@
+import os
+import tempfile
+import threading
+import time
+
+import fitz  # PyMuPDF
+
+from backend.resource_governor import JobRejected, ResourceGovernor
+
+def make_pdf(path: str, pages: int):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {i + 1} of a sample reference.")
+    doc.save(path)
+
+def main():
+    directory = tempfile.mkdtemp()
+    small = os.path.join(directory, "small.pdf")
+    large = os.path.join(directory, "large.pdf")
+    make_pdf(small, 3)
+    make_pdf(large, 40)
+
+    governor = ResourceGovernor(
+        cpu_slots=1,
+        max_job_pages=20,
+        job_rss_ceiling=32 << 20,
+        queue_timeout=0.2,
+        poll_interval=0.05
+    )
+
+    estimate = governor.estimate([small])
+    print("\n=== RESOURCE GOVERNOR ===\n")
+    print(f"Estimate: {estimate}")
+
+    # Too many pages → rejected before running
+    rejected = None
+    try:
+        with governor.admit(governor.estimate([large])):
+            pass
+    except JobRejected as e:
+        rejected = str(e)
+    print(f"Large job: {rejected}")
+
+    # One CPU slot → a second job queues, then times out
+    queued = []
+    with governor.admit(estimate) as token:
+        def second():
+            try:
+                with governor.admit(estimate, on_queued=queued.append):
+                    pass
+            except JobRejected as e:
+                queued.append(str(e))
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        thread.join()
+
+        # RSS growth past the ceiling cancels the running job
+        ballast = bytearray(64 << 20)
+        for _ in range(40):
+            if token.cancelled:
+                break
+            time.sleep(0.05)
+        del ballast
+
+    print(f"Second job: {queued}")
+    print(f"First job cancelled: {token.cancelled} ({token.reason})")
+
+    # Growth covered by a neighbour's reservation is not charged
+    # to the small job running next to it
+    shared = ResourceGovernor(
+        cpu_slots=2,
+        job_rss_ceiling=32 << 20,
+        poll_interval=0.05
+    )
+    small_job = dict(estimate, memory_bytes=16 << 20)
+    big_job = dict(estimate, memory_bytes=256 << 20)
+    with shared.admit(small_job) as small_token, shared.admit(big_job):
+        ballast = bytearray(64 << 20)
+        time.sleep(0.3)
+        del ballast
+    print(f"Small job next to a big one cancelled: {small_token.cancelled}")
+
+    assert not small_token.cancelled
+    assert estimate["pages"] == 3
+    assert rejected is not None
+    assert queued[-1] == "server busy, try again later"
+    assert token.cancelled
+
+if __name__ == "__main__":
+    main()
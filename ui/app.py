@@ -1,6 +1,11 @@
 import os
+import threading
+import uuid
+from collections import defaultdict
 import streamlit as st
 
+from backend.blob_store import BlobStore
+from backend.resource_governor import JobRejected, ResourceGovernor
 from backend.pipeline import CitationPipeline
 from backend.docx_handler import DocxHandler
 
@@ -17,13 +22,45 @@ st.title("📚 Automatic Reference Adder")
 st.write("Upload a Word document and reference PDFs to generate citations automatically.")
 
 BASE_STORAGE = "storage"
-DOCX_DIR = os.path.join(BASE_STORAGE, "uploaded_docs")
-PDF_DIR = os.path.join(BASE_STORAGE, "uploaded_pdfs")
-OUTPUT_DIR = "output"
+BLOB_DIR = os.path.join(BASE_STORAGE, "blobs")
+BLOB_STORE_MAX_BYTES = 2 << 30  # 2 GiB of uploads kept on disk
+JOB_MEMORY_BUDGET = 2 << 30    # projected bytes across running jobs
+MAX_JOB_PAGES = 3000
 
-os.makedirs(DOCX_DIR, exist_ok=True)
-os.makedirs(PDF_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+@st.cache_resource
+def get_blob_store() -> BlobStore:
+    # One store per process, shared by all sessions
+    return BlobStore(BLOB_DIR, max_bytes=BLOB_STORE_MAX_BYTES)
+
+
+@st.cache_resource
+def get_governor() -> ResourceGovernor:
+    # Admission control shared by all sessions in this process
+    return ResourceGovernor(
+        memory_budget=JOB_MEMORY_BUDGET,
+        max_job_pages=MAX_JOB_PAGES
+    )
+
+
+@st.cache_resource
+def get_work_locks() -> defaultdict:
+    # One lock per work directory: runs on the same DOCX and PDFs
+    # share a manifest and index, so they take turns
+    return defaultdict(threading.Lock)
+
+
+blob_store = get_blob_store()
+governor = get_governor()
+work_locks = get_work_locks()
+
+# Per-session output folder so concurrent users never clash; it is a
+# blob store work dir, so old sessions' outputs count against (and are
+# evicted under) the same disk budget
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+
+SESSION_KEY = st.session_state["session_id"]
 
 
 # ------------------------------
@@ -45,6 +82,13 @@ citation_style = st.selectbox(
     ["APA", "IEEE", "MLA"]
 )
 
+time_budget = st.number_input(
+    "Time limit in seconds (0 = no limit)",
+    min_value=0,
+    value=0,
+    step=30
+)
+
 process_btn = st.button("🚀 Generate Citations")
 
 
@@ -55,61 +99,105 @@ if process_btn:
     if not uploaded_docx or not uploaded_pdfs:
         st.error("Please upload both DOCX and at least one PDF.")
     else:
-        with st.spinner("Processing documents..."):
-
-            # Save DOCX
-            docx_path = os.path.join(DOCX_DIR, uploaded_docx.name)
-            with open(docx_path, "wb") as f:
-                f.write(uploaded_docx.read())
-
-            # Save PDFs
-            pdf_paths = []
-            for pdf in uploaded_pdfs:
-                pdf_path = os.path.join(PDF_DIR, pdf.name)
-                with open(pdf_path, "wb") as f:
-                    f.write(pdf.read())
-                pdf_paths.append(pdf_path)
-
-            # Run pipeline
-            pipeline = CitationPipeline(similarity_threshold=0.75)
-            temp_output = os.path.join(OUTPUT_DIR, "with_markers.docx")
-
-            pipeline.run(
-                input_docx=docx_path,
-                reference_pdfs=pdf_paths,
-                output_docx=temp_output
-            )
-
-            # --- Temporary metadata (can be replaced by GROBID later)
-            reference_metadata = {}
-            for i, pdf in enumerate(uploaded_pdfs, start=1):
-                reference_metadata[pdf.name] = {
-                    "authors": ["Unknown Author"],
-                    "year": "n.d.",
-                    "title": pdf.name.replace(".pdf", ""),
-                    "source": "User Provided PDF"
-                }
-
-            # Finalize document
-            final_output = os.path.join(
-                OUTPUT_DIR,
-                f"cited_{uploaded_docx.name}"
-            )
-
-            handler = DocxHandler()
-            handler.finalize_document(
-                input_docx=temp_output,
-                output_docx=final_output,
-                reference_metadata=reference_metadata,
-                citation_style=citation_style
-            )
-
-        st.success("✅ Citations generated successfully!")
-
-        with open(final_output, "rb") as f:
-            st.download_button(
-                label="⬇️ Download Final Document",
-                data=f,
-                file_name=f"cited_{uploaded_docx.name}",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            )
+        # Session outputs stay pinned until the download is served
+        with blob_store.pinned([SESSION_KEY]):
+            session_output_dir = blob_store.work_dir(SESSION_KEY)
+
+            with st.spinner("Processing documents..."):
+
+                # Store uploads by content hash (deduplicated across users),
+                # pinned until the job is done so gc cannot evict them
+                docx_blob = blob_store.put(uploaded_docx, suffix=".docx", pin=True)
+                pdf_blobs = [blob_store.put(pdf, suffix=".pdf", pin=True) for pdf in uploaded_pdfs]
+
+                docx_path = docx_blob["path"]
+                pdf_paths = [blob["path"] for blob in pdf_blobs]
+                reference_ids = [pdf.name for pdf in uploaded_pdfs]
+
+                digests = [docx_blob["digest"]] + [b["digest"] for b in pdf_blobs]
+
+                # Manifest and index are kept per DOCX name + PDF contents,
+                # so a revised DOCX reuses them from any session
+                work_key = BlobStore.work_key(
+                    uploaded_docx.name, [b["digest"] for b in pdf_blobs]
+                )
+
+                # Run pipeline
+                pipeline = CitationPipeline(similarity_threshold=0.75)
+                try:
+                    with blob_store.pinned([work_key]):
+                        work_dir = blob_store.work_dir(work_key)
+                        blob_store.gc()
+
+                        estimate = governor.estimate(pdf_paths, docx_path)
+                        temp_output = os.path.join(
+                            session_output_dir,
+                            f"with_markers_{uploaded_docx.name}"
+                        )
+
+                        with work_locks[work_key], governor.admit(
+                            estimate,
+                            on_queued=lambda status: st.info(
+                                f"⏳ Queued: {status['running']} jobs running"
+                            )
+                        ) as cancel_token:
+                            report = pipeline.run(
+                                input_docx=docx_path,
+                                reference_pdfs=pdf_paths,
+                                output_docx=temp_output,
+                                reference_ids=reference_ids,
+                                time_budget=time_budget or None,
+                                cancel_token=cancel_token,
+                                state_path=os.path.join(work_dir, "state")
+                            )
+                except JobRejected as e:
+                    st.error(f"Job rejected: {e}")
+                    st.stop()
+                finally:
+                    # Release encoder/OCR pools on success, failure or rejection
+                    pipeline.close()
+                    blob_store.unpin(digests)
+
+                # --- Temporary metadata (can be replaced by GROBID later)
+                reference_metadata = {}
+                for pdf, blob in zip(uploaded_pdfs, pdf_blobs):
+                    reference_metadata[pdf.name] = {
+                        "authors": ["Unknown Author"],
+                        "year": "n.d.",
+                        "title": pdf.name.replace(".pdf", ""),
+                        "source": "User Provided PDF",
+                        "sha256": blob["digest"]
+                    }
+
+                # Finalize document
+                final_output = os.path.join(
+                    session_output_dir,
+                    f"cited_{uploaded_docx.name}"
+                )
+
+                handler = DocxHandler()
+                handler.finalize_document(
+                    input_docx=temp_output,
+                    output_docx=final_output,
+                    reference_metadata=reference_metadata,
+                    citation_style=citation_style
+                )
+
+            partial = report["partial"]
+            if partial["complete"]:
+                st.success("✅ Citations generated successfully!")
+            else:
+                st.warning(
+                    f"⏱️ Stopped early ({partial['stopped']}), citations are partial: "
+                    f"{partial['paragraphs_unmatched']} paragraphs unmatched, "
+                    f"{len(partial['pdfs_skipped'])} PDFs skipped, "
+                    f"{len(partial['ocr_incomplete'])} PDFs only partly OCR'd."
+                )
+
+            with open(final_output, "rb") as f:
+                st.download_button(
+                    label="⬇️ Download Final Document",
+                    data=f,
+                    file_name=f"cited_{uploaded_docx.name}",
+                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                )